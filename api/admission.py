@@ -0,0 +1,200 @@
+import asyncio
+import math
+import time
+from collections import deque
+from utils.config import settings
+from utils.logger import app_logger
+from utils.metrics import metrics
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is shed instead of being queued.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Per-worker admission control for the verification pipeline.
+
+    Keeps a bounded number of requests in flight and a bounded queue per
+    priority class. Interactive requests are always dequeued before batch
+    requests. The concurrency limit adapts with AIMD from the latency of the
+    local CV stages (including waiting for a CV worker), so slow Azure calls
+    don't throttle an idle CPU. That latency is compared with its recent
+    minimum: the limit grows by one slot per full window of requests within
+    `latency_tolerance` times the minimum and shrinks multiplicatively beyond it.
+    """
+
+    PRIORITIES = ("interactive", "batch")
+
+    def __init__(self,
+                 initial_limit: int = settings.ADMISSION_INITIAL_LIMIT,
+                 min_limit: int = settings.ADMISSION_MIN_LIMIT,
+                 max_limit: int = settings.ADMISSION_MAX_LIMIT,
+                 max_queue: dict = None,
+                 max_wait: float = settings.ADMISSION_MAX_WAIT_SECONDS,
+                 latency_tolerance: float = settings.ADMISSION_LATENCY_TOLERANCE,
+                 min_latency_window: int = settings.ADMISSION_MIN_LATENCY_WINDOW,
+                 backoff_ratio: float = settings.ADMISSION_BACKOFF_RATIO):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue or {
+            "interactive": settings.ADMISSION_MAX_QUEUE_INTERACTIVE,
+            "batch": settings.ADMISSION_MAX_QUEUE_BATCH,
+        }
+        self.max_wait = max_wait
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._queues = {p: deque() for p in self.PRIORITIES}
+        self._avg_latency = 1.0
+        self._stage_samples = deque(maxlen=min_latency_window)
+        self._avg_stage_latency = 0.0
+        self._last_decrease = 0.0
+
+        metrics.describe("admission_in_flight", "gauge", "Requests currently running the pipeline.")
+        metrics.describe("admission_limit", "gauge", "Current adaptive concurrency limit.")
+        metrics.describe("admission_queue_depth", "gauge", "Requests waiting for a slot.")
+        metrics.describe("admission_wait_seconds", "summary", "Time spent waiting for a slot.")
+        metrics.describe("admission_shed_total", "counter", "Requests rejected with 503.")
+        metrics.describe("admission_latency_seconds", "summary", "Pipeline latency of admitted requests.")
+        metrics.describe("admission_stage_latency_seconds", "summary", "Local CV stage latency fed to the limiter.")
+        self._publish()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def normalize_priority(self, priority: str) -> str:
+        priority = (priority or "").strip().lower()
+        return priority if priority in self.PRIORITIES else "interactive"
+
+    def retry_after(self) -> int:
+        """
+        Estimated seconds until the current backlog drains.
+        """
+        queued = sum(len(q) for q in self._queues.values())
+        estimate = self._avg_latency * (queued + 1) / max(self.limit, 1)
+        return max(1, math.ceil(estimate))
+
+    async def acquire(self, priority: str = "interactive", timeout: float = None) -> float:
+        """
+        Waits for a pipeline slot and returns the time spent queued.
+        Raises AdmissionRejected if the queue is full or the wait times out.
+        """
+        priority = self.normalize_priority(priority)
+        if self._in_flight < self.limit and not any(self._queues.values()):
+            self._in_flight += 1
+            metrics.observe("admission_wait_seconds", 0.0, priority=priority)
+            self._publish()
+            return 0.0
+
+        queue = self._queues[priority]
+        if len(queue) >= self.max_queue[priority]:
+            self._shed(priority, "queue_full")
+            raise AdmissionRejected("Server is at capacity, please retry later.", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        self._publish()
+        started = time.monotonic()
+        wait_limit = self.max_wait if timeout is None else min(self.max_wait, timeout)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=wait_limit)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the timer fired; keep it.
+                pass
+            else:
+                waiter.cancel()
+                self._discard(queue, waiter)
+                self._shed(priority, "wait_timeout")
+                raise AdmissionRejected("Timed out waiting for capacity, please retry later.", self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot handed over to a client that went away: give it back.
+                self._in_flight -= 1
+                self._wake()
+            else:
+                waiter.cancel()
+                self._discard(queue, waiter)
+            self._publish()
+            raise
+
+        waited = time.monotonic() - started
+        metrics.observe("admission_wait_seconds", waited, priority=priority)
+        return waited
+
+    def release(self, latency: float = None, stage_latency: float = None):
+        """
+        Frees a slot. Pass the latencies of successful requests only: the
+        end-to-end latency feeds the Retry-After estimate and the local
+        stage latency feeds the limit. Failed requests pass neither, so fast
+        errors don't look like spare capacity.
+        """
+        self._in_flight = max(self._in_flight - 1, 0)
+        if latency is not None:
+            metrics.observe("admission_latency_seconds", latency)
+            self._avg_latency = 0.8 * self._avg_latency + 0.2 * latency
+        if stage_latency is not None:
+            metrics.observe("admission_stage_latency_seconds", stage_latency)
+            self._adapt(stage_latency)
+        self._wake()
+        self._publish()
+
+    def _adapt(self, latency: float):
+        self._stage_samples.append(latency)
+        self._avg_stage_latency = 0.8 * self._avg_stage_latency + 0.2 * latency
+        now = time.monotonic()
+
+        if latency > min(self._stage_samples) * self.latency_tolerance:
+            # Decrease at most once per average stage latency so one slow
+            # burst does not collapse the limit to the floor.
+            if now - self._last_decrease >= self._avg_stage_latency:
+                new_limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                if int(new_limit) < self.limit:
+                    app_logger.info("Admission limit decreased to {} (stage latency {:.2f}s)", int(new_limit), latency)
+                self._limit = new_limit
+                self._last_decrease = now
+        elif self._in_flight + 1 >= self.limit:
+            # Only grow when the current limit is actually being used.
+            self._limit = min(self.max_limit, self._limit + 1.0 / max(self._limit, 1.0))
+
+    def _wake(self):
+        for priority in self.PRIORITIES:
+            queue = self._queues[priority]
+            while queue and self._in_flight < self.limit:
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    @staticmethod
+    def _discard(queue: deque, waiter):
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+
+    def _shed(self, priority: str, reason: str):
+        metrics.inc("admission_shed_total", priority=priority, reason=reason)
+        app_logger.warning("Shedding {} request: {}", priority, reason)
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge("admission_in_flight", self._in_flight)
+        metrics.set_gauge("admission_limit", self.limit)
+        for priority, queue in self._queues.items():
+            metrics.set_gauge("admission_queue_depth", len(queue), priority=priority)
+
+
+admission_controller = AdmissionController()
@@ -1,7 +1,12 @@
-from fastapi import FastAPI
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from api.routes import router
+from pipeline.cv_pool import cv_executor
 from utils.config import settings
-from utils.logger import app_logger
+from utils.deadline import Deadline
+from utils.logger import app_logger, request_id_var
+from utils.metrics import metrics
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -10,10 +15,36 @@ app = FastAPI(
 
 app.include_router(router, prefix=settings.API_V1_STR)
 
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+@app.middleware("http")
+async def deadline_middleware(request: Request, call_next):
+    # Started before the upload is read, so the client's whole timeout is covered
+    request.state.deadline = Deadline.from_header(request.headers.get("X-Request-Timeout"))
+    return await call_next(request)
+
 @app.on_event("startup")
 async def startup_event():
     app_logger.info("Starting Aadhaar Verification API...")
+    cv_executor.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    cv_executor.close()
 
 @app.get("/")
 async def root():
     return {"message": "Aadhaar Verification API is running"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return metrics.render()
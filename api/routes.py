@@ -1,80 +1,205 @@
 import shutil
 import os
 import tempfile
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from preprocessing.image_cleaner import ImageCleaner
-from preprocessing.deskew import Deskew
-from preprocessing.quality_metrics import QualityMetrics
+import time
+import cv2
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from api.admission import admission_controller, AdmissionRejected
 from ocr.azure_ocr import AzureOCR
 from ocr.field_extractor import FieldExtractor
 from ocr.validator import Validator
+from ocr.secure_qr import SecureQRDecoder
 from llm.openai_refiner import OpenAIRefiner
-from fraud_detection.yolo_detector import YoloDetector
-from fraud_detection.anomaly_model import AnomalyModel
 from fraud_detection.forgery_rules import ForgeryRules
+from fraud_detection.yolo_detector import YoloDetector
 from scoring.confidence_engine import ConfidenceEngine
 from scoring.decision_engine import DecisionEngine
+from scoring.stage_store import stage_store
+from pipeline.cv_pool import cv_executor
+from pipeline.ingest import DocumentIngest, PDFPasswordError
+from utils.config import settings
+from utils.deadline import Deadline, DeadlineExceeded
 from utils.logger import app_logger
+from utils.metrics import metrics
 
 router = APIRouter()
 
 # Initialize services
 azure_ocr = AzureOCR()
 openai_refiner = OpenAIRefiner()
-yolo_detector = YoloDetector()
-anomaly_model = AnomalyModel()
 
 @router.post("/verify-document")
-async def verify_document(file: UploadFile = File(...)):
+async def verify_document(request: Request, file: UploadFile = File(...), back: Optional[UploadFile] = File(None),
+                          password: Optional[str] = Form(None), x_priority: str = Header("interactive")):
     """
     Main endpoint to verify Aadhaar document.
+    `file` is an image or a (multi-page) PDF such as e-Aadhaar; `back` is an
+    optional image of the back of a physical card; `password` opens an
+    encrypted PDF. An `X-Request-Timeout` header (seconds) sets the deadline
+    every stage works against.
     """
-    temp_file_path = ""
+    deadline = getattr(request.state, "deadline", None) or Deadline.from_header()
+    priority = admission_controller.normalize_priority(x_priority)
     try:
-        # 1. Save uploaded file temporarily
-        suffix = os.path.splitext(file.filename)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            temp_file_path = tmp.name
-            
-        app_logger.info(f"Processing file: {temp_file_path}")
+        await admission_controller.acquire(priority, timeout=deadline.budget())
+    except AdmissionRejected as e:
+        if deadline.budget() <= 0:
+            raise _deadline_exceeded(deadline, "admission")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
-        # 2. Preprocessing
-        # Load image for CV tasks
-        clean_img = ImageCleaner.preprocess_for_ocr(temp_file_path)
-        deskewed_img = Deskew.deskew_image(clean_img)
-        
-        # Quality Check
-        quality_report = QualityMetrics.assess_quality(deskewed_img)
-        if not quality_report["quality_pass"]:
-            app_logger.warning(f"Image quality failed: {quality_report}")
-            # We continue but flag it? Or return error? 
-            # For now, we continue but note it.
-
-        # 3. Fraud Detection
-        yolo_result = yolo_detector.detect_fraud_features(temp_file_path)
-        anomaly_score = anomaly_model.predict_anomaly(deskewed_img)
-        forgery_score = ForgeryRules.calculate_forgery_score({}, temp_file_path) # OCR result not ready yet
+    started = time.monotonic()
+    stats = {}
+    try:
+        # The pipeline is CPU and network bound; keep it off the event loop
+        # so queued requests can still be admitted or shed.
+        uploads = [upload for upload in (file, back) if upload is not None]
+        response = await run_in_threadpool(_run_pipeline, uploads, deadline, stats, password)
+    except BaseException:
+        # Failures carry no useful latency signal
+        admission_controller.release()
+        raise
+    admission_controller.release(time.monotonic() - started, stats.get("cv_seconds"))
+    return response
+
+
+def _deadline_exceeded(deadline: Deadline, stage: str) -> HTTPException:
+    app_logger.warning("Request deadline of {}s exceeded at stage {}", deadline.timeout, stage)
+    metrics.inc("deadline_exceeded_total", stage=stage)
+    return HTTPException(status_code=504, detail=f"Request deadline exceeded at stage '{stage}'")
+
+
+def _process_page(page_bytes: bytes, deadline: Deadline) -> tuple:
+    """
+    Runs the CV stages on one page and returns (rectified card JPEG, CV report).
+    """
+    deadline.check("cv")
+    try:
+        with cv_executor.process(page_bytes, timeout=deadline.budget(settings.CV_POOL_TASK_TIMEOUT_SECONDS),
+                                 deadline=deadline) as (card_img, cv_report):
+            # OCR gets the rectified card rather than the original upload
+            _, encoded = cv2.imencode(".jpg", card_img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    except Exception as e:
+        # Pool timeouts and worker-side deadline errors both mean we ran out of time
+        if deadline.budget() <= 0:
+            raise DeadlineExceeded("cv") from e
+        raise
+
+    for stage, seconds in cv_report["timings"].items():
+        metrics.observe("pipeline_stage_seconds", seconds, stage=stage)
+    return encoded.tobytes(), cv_report
+
+
+def _read_secure_qr(page_reports: list) -> dict:
+    """
+    Returns the fields of the first page whose secure QR parses and carries a
+    valid UIDAI signature, or None.
+    """
+    for report in page_reports:
+        if not report.get("qr_payload"):
+            continue
+        with metrics.timer("pipeline_stage_seconds", stage="qr_verify"):
+            parsed = SecureQRDecoder.parse(report["qr_payload"])
+        if parsed and parsed.pop("signature_valid"):
+            return parsed
+    return None
+
+
+def _run_pipeline(uploads: List[UploadFile], deadline: Deadline, stats: dict, password: str = None) -> dict:
+    """
+    Runs every verification stage for one submission (one or more files),
+    skipping optional stages when the deadline is close. The wall time of the
+    local CV stages is stored in stats["cv_seconds"] for admission control.
+    """
+    temp_file_paths = []
+    try:
+        # 1. Save uploaded files temporarily
+        for upload in uploads:
+            suffix = os.path.splitext(upload.filename or "")[1]
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                shutil.copyfileobj(upload.file, tmp)
+                temp_file_paths.append(tmp.name)
+            app_logger.info("Processing upload ({} bytes, type {})", os.path.getsize(tmp.name), suffix)
+
+        # 2-3. Preprocessing & Fraud Detection
+        # Pages are streamed from the uploads and processed in parallel in the CV pool
+        cv_started = time.monotonic()
+        pages = DocumentIngest.map_pages(
+            DocumentIngest.iter_pages(temp_file_paths, password=password), lambda page: _process_page(page, deadline)
+        )
+        stats["cv_seconds"] = time.monotonic() - cv_started
+        if not pages:
+            raise ValueError("No pages found in upload")
+        page_images = [image for image, _ in pages]
+        page_reports = [report for _, report in pages]
+        # Pool workers degrade stages on their own copy of the deadline
+        for report in page_reports:
+            for stage in report["degraded"]:
+                deadline.skip(stage)
+
+        # The first page is the front of the card
+        rectification = page_reports[0]["rectification"]
+        quality_report = page_reports[0]["quality"]
+        for index, report in enumerate(page_reports):
+            if not report["quality"]["quality_pass"]:
+                app_logger.warning("Image quality failed on page {}: {}", index + 1, report["quality"])
+                # We continue but flag it? Or return error? 
+                # For now, we continue but note it.
+
+        # Mandatory elements may be on either side, so score detections of all pages together
+        detections = [d for report in page_reports for d in report["yolo"]["detections"]]
+        yolo_result = {"detections": detections, "fraud_score": YoloDetector.score_detections(detections)}
+        anomaly_score = max(report["anomaly_score"] for report in page_reports)
+        forgery_score = max(
+            ForgeryRules.calculate_forgery_score({}, path) for path in temp_file_paths
+        ) # OCR result not ready yet
         
         combined_fraud_score = max(yolo_result["fraud_score"], forgery_score)
 
-        # 4. OCR Extraction
-        # Read file bytes for Azure OCR
-        with open(temp_file_path, "rb") as f:
-            file_bytes = f.read()
+        # 4. Extraction
+        # Offline fast path: a verified secure QR replaces cloud OCR and the LLM refiner
+        qr_fields = _read_secure_qr(page_reports)
+        if qr_fields:
+            extraction_source = "secure_qr"
+            ocr_result = {"documents": []}
+            extracted_fields = qr_fields
+            validation_report = Validator.validate_extracted_data(extracted_fields)
+            refined_data = extracted_fields
+            # The signature guarantees the fields, so extraction is fully confident
+            ocr_conf = 1.0
+        else:
+            extraction_source = "ocr"
+            # One request for all pages; fields are merged across pages afterwards
+            file_bytes = DocumentIngest.build_ocr_document(page_images)
+            deadline.check("ocr")
+            with metrics.timer("pipeline_stage_seconds", stage="ocr"):
+                try:
+                    ocr_result = azure_ocr.analyze_document(file_bytes, timeout=deadline.budget())
+                except TimeoutError as e:
+                    raise DeadlineExceeded("ocr") from e
+            extracted_fields = FieldExtractor.extract_aadhaar_fields(ocr_result)
             
-        ocr_result = azure_ocr.analyze_document(file_bytes)
-        extracted_fields = FieldExtractor.extract_aadhaar_fields(ocr_result)
-        
-        # 5. Validation & Refinement
-        validation_report = Validator.validate_extracted_data(extracted_fields)
-        
-        # Use LLM to refine if needed (e.g. if validation fails or just to normalize)
-        refined_data = openai_refiner.refine_extracted_data(extracted_fields)
+            # 5. Validation & Refinement
+            validation_report = Validator.validate_extracted_data(extracted_fields)
+            
+            # Use LLM to refine if needed (e.g. if validation fails or just to normalize)
+            refined_data = extracted_fields
+            if deadline.allows("llm", settings.DEADLINE_MIN_LLM_SECONDS):
+                with metrics.timer("pipeline_stage_seconds", stage="llm"):
+                    try:
+                        refined_data = openai_refiner.refine_extracted_data(extracted_fields, timeout=deadline.budget())
+                    except TimeoutError:
+                        # Refinement is optional: keep the OCR fields and report the stage as degraded
+                        deadline.skip("llm")
+
+            ocr_conf = ConfidenceEngine.calculate_ocr_confidence(ocr_result)
         
         # 6. Scoring
-        ocr_conf = ConfidenceEngine.calculate_ocr_confidence(ocr_result)
-        
         final_risk = DecisionEngine.calculate_risk_score(
             ocr_conf=ocr_conf,
             yolo_fraud_score=combined_fraud_score,
@@ -82,11 +207,41 @@ async def verify_document(file: UploadFile = File(...)):
         )
         
         decision = DecisionEngine.make_decision(final_risk)
+        if deadline.degraded:
+            app_logger.info("Degraded stages to meet the deadline: {}", deadline.degraded)
+
+        # Keep the raw stage outputs so policies can be re-scored offline
+        stage_store.append({
+            "ocr_confidence": ocr_conf,
+            "yolo_fraud_score": yolo_result["fraud_score"],
+            "forgery_score": forgery_score,
+            "fraud_score": combined_fraud_score,
+            "anomaly_score": anomaly_score,
+            "blur_score": quality_report["blur_score"],
+            "lighting_score": quality_report["lighting_score"],
+            "quality_pass": quality_report["quality_pass"],
+            "validation_score": validation_report["validation_score"],
+            "risk_score": final_risk,
+            "decision": DecisionEngine.DECISIONS.index(decision),
+            "degraded": deadline.degraded,
+        })
         
         return {
             "extracted_data": refined_data,
+            "extraction_source": extraction_source,
+            "degraded_stages": deadline.degraded,
             "validation_report": validation_report,
             "quality_metrics": quality_report,
+            "rectification": rectification,
+            "pages": [
+                {
+                    "page": index + 1,
+                    "rectification": report["rectification"],
+                    "quality_metrics": report["quality"],
+                    "anomaly_score": report["anomaly_score"],
+                }
+                for index, report in enumerate(page_reports)
+            ],
             "scores": {
                 "ocr_confidence": ocr_conf,
                 "fraud_score": combined_fraud_score,
@@ -97,10 +252,16 @@ async def verify_document(file: UploadFile = File(...)):
             "fraud_details": yolo_result["detections"]
         }
 
+    except DeadlineExceeded as e:
+        raise _deadline_exceeded(deadline, e.stage)
+    except PDFPasswordError as e:
+        app_logger.info("Rejected upload: {}", e)
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
-        app_logger.error(f"Error processing request: {e}")
+        app_logger.error("Error processing request: {}", e)
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         # Cleanup
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+        for temp_file_path in temp_file_paths:
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
@@ -23,5 +23,5 @@ class AnomalyModel:
             # Mock implementation
             return 0.1 
         except Exception as e:
-            app_logger.error(f"Error in anomaly detection: {e}")
+            app_logger.error("Error in anomaly detection: {}", e)
             return 0.0
@@ -1,8 +1,8 @@
-from ultralytics import YOLO
 from utils.config import settings
 from utils.logger import app_logger
 import cv2
 import numpy as np
+from typing import Union
 
 class YoloDetector:
     """
@@ -10,26 +10,28 @@ class YoloDetector:
     """
     
     def __init__(self):
+        # Imported here so processes that only score detections don't load torch
+        from ultralytics import YOLO
+
         self.model_path = settings.YOLO_MODEL_PATH
         try:
             self.model = YOLO(self.model_path)
         except Exception as e:
-            app_logger.warning(f"Could not load YOLO model at {self.model_path}. Using default yolov8n.pt for demo.")
+            app_logger.warning("Could not load YOLO model at {}. Using default yolov8n.pt for demo.", self.model_path)
             self.model = YOLO("yolov8n.pt") # Fallback for development
 
-    def detect_fraud_features(self, image_path: str) -> dict:
+    def detect_fraud_features(self, image: Union[str, np.ndarray]) -> dict:
         """
-        Run inference on the image to detect classes like:
+        Run inference on the image (file path or BGR array) to detect classes like:
         - 'tampered_text'
         - 'photoshop_artifact'
         - 'qr_code'
         - 'emblem'
         """
         try:
-            results = self.model(image_path)
+            results = self.model(image)
             
             detections = []
-            fraud_score = 0.0
             
             # Example class mapping (needs to match trained model)
             # 0: tampered_text
@@ -37,8 +39,6 @@ class YoloDetector:
             # 2: qr_code
             # 3: emblem
             
-            detected_classes = []
-            
             for r in results:
                 boxes = r.boxes
                 for box in boxes:
@@ -51,24 +51,34 @@ class YoloDetector:
                         "confidence": conf,
                         "bbox": box.xyxy[0].tolist()
                     })
-                    
-                    detected_classes.append(label)
-                    
-                    # Logic: If 'tampered_text' is detected with high confidence
-                    if label == "tampered_text" and conf > 0.5:
-                        fraud_score += 0.8
-            
-            # Check for missing mandatory elements
-            if "qr_code" not in detected_classes:
-                fraud_score += 0.2
-            if "emblem" not in detected_classes:
-                fraud_score += 0.1
                 
             return {
                 "detections": detections,
-                "fraud_score": min(fraud_score, 1.0)
+                "fraud_score": YoloDetector.score_detections(detections)
             }
             
         except Exception as e:
-            app_logger.error(f"Error in YOLO detection: {e}")
+            app_logger.error("Error in YOLO detection: {}", e)
             return {"detections": [], "fraud_score": 0.0}
+
+    @staticmethod
+    def score_detections(detections: list) -> float:
+        """
+        Fraud score from a list of detections. For multi-page submissions pass
+        the detections of all pages, so a QR code on the back counts for the card.
+        """
+        fraud_score = 0.0
+        detected_classes = [d["class"] for d in detections]
+        
+        for d in detections:
+            # Logic: If 'tampered_text' is detected with high confidence
+            if d["class"] == "tampered_text" and d["confidence"] > 0.5:
+                fraud_score += 0.8
+        
+        # Check for missing mandatory elements
+        if "qr_code" not in detected_classes:
+            fraud_score += 0.2
+        if "emblem" not in detected_classes:
+            fraud_score += 0.1
+            
+        return min(fraud_score, 1.0)
@@ -1,5 +1,5 @@
 import json
-from openai import AzureOpenAI
+from openai import APITimeoutError, AzureOpenAI
 from utils.config import settings
 from utils.logger import app_logger
 from llm.prompt_templates import PromptTemplates
@@ -25,17 +25,24 @@ class OpenAIRefiner:
                 azure_endpoint=self.endpoint
             )
 
-    def refine_extracted_data(self, raw_data: dict) -> dict:
+    def refine_extracted_data(self, raw_data: dict, timeout: float = None) -> dict:
         """
         Sends raw OCR data to LLM for correction.
+        With a timeout (seconds), the call is not retried and raises
+        TimeoutError once the timeout has passed, so the caller can report the
+        stage as degraded. Other failures return the raw data unchanged.
         """
         if not self.client:
             return raw_data
 
         try:
             prompt = PromptTemplates.AADHAAR_CORRECTION_USER.format(raw_data=json.dumps(raw_data))
+
+            client = self.client
+            if timeout is not None:
+                client = client.with_options(timeout=timeout, max_retries=0)
             
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=self.deployment,
                 messages=[
                     {"role": "system", "content": PromptTemplates.AADHAAR_CORRECTION_SYSTEM},
@@ -49,9 +56,12 @@ class OpenAIRefiner:
             corrected_data = json.loads(content)
             return corrected_data
             
+        except APITimeoutError as e:
+            app_logger.warning("Azure OpenAI refinement timed out: {}", e)
+            raise TimeoutError("Azure OpenAI refinement timed out") from e
         except Exception as e:
             if "DeploymentNotFound" in str(e):
-                app_logger.error(f"Azure OpenAI Deployment '{self.deployment}' not found. Please check AZURE_OPENAI_DEPLOYMENT_NAME in .env")
+                app_logger.error("Azure OpenAI Deployment '{}' not found. Please check AZURE_OPENAI_DEPLOYMENT_NAME in .env", self.deployment)
             else:
-                app_logger.error(f"Error refining data with OpenAI: {e}")
+                app_logger.error("Error refining data with OpenAI: {}", e)
             return raw_data
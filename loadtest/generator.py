@@ -0,0 +1,218 @@
+import asyncio
+import itertools
+import mimetypes
+import os
+import random
+import re
+import time
+from typing import Dict, List, Tuple
+import httpx
+import numpy as np
+
+STAGE_METRIC = re.compile(r'^pipeline_stage_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+ADMISSION_WAIT_METRIC = re.compile(r'^admission_wait_seconds_(sum|count)\{priority="[^"]+"\} (\S+)$')
+
+
+class RequestResult:
+    __slots__ = ("started", "latency", "status", "error", "degraded")
+
+    def __init__(self, started: float, latency: float, status: int, error: str = None, degraded: list = None):
+        self.started = started
+        self.latency = latency
+        self.status = status
+        self.error = error
+        self.degraded = degraded or []
+
+
+def load_images(directory: str) -> List[Tuple[str, bytes, str]]:
+    """
+    Reads every image/PDF in a directory as (filename, content, content type).
+    """
+    images = []
+    for name in sorted(os.listdir(directory)):
+        content_type = mimetypes.guess_type(name)[0] or ""
+        if not (content_type.startswith("image/") or content_type == "application/pdf"):
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            images.append((name, f.read(), content_type))
+    if not images:
+        raise ValueError(f"No images found in {directory}")
+    return images
+
+
+def parse_stage_metrics(text: str) -> Dict[str, List[float]]:
+    """
+    Extracts {stage: [sum, count]} of pipeline_stage_seconds from /metrics
+    output, plus the admission queue wait (all priorities) as "admission_wait".
+    """
+    stages = {}
+    for line in text.splitlines():
+        match = STAGE_METRIC.match(line)
+        if match:
+            kind, stage, value = match.groups()
+            stages.setdefault(stage, [0.0, 0.0])[0 if kind == "sum" else 1] = float(value)
+            continue
+        match = ADMISSION_WAIT_METRIC.match(line)
+        if match:
+            kind, value = match.groups()
+            stages.setdefault("admission_wait", [0.0, 0.0])[0 if kind == "sum" else 1] += float(value)
+    return stages
+
+
+def stage_breakdown(before: Dict[str, List[float]], after: Dict[str, List[float]]) -> Dict[str, float]:
+    """
+    Mean seconds per stage for the samples recorded between two scrapes.
+    """
+    breakdown = {}
+    for stage, (total, count) in after.items():
+        prev_total, prev_count = before.get(stage, (0.0, 0.0))
+        if count > prev_count:
+            breakdown[stage] = (total - prev_total) / (count - prev_count)
+    return breakdown
+
+
+def summarize(results: List[RequestResult], elapsed: float) -> dict:
+    """
+    Throughput, latency percentiles and error rates of one load level.
+    """
+    ok = [r for r in results if r.status == 200]
+    latencies = np.array([r.latency for r in ok]) if ok else np.zeros(1)
+    statuses = {}
+    for r in results:
+        key = str(r.status) if r.status else (r.error or "error")
+        statuses[key] = statuses.get(key, 0) + 1
+
+    total = max(len(results), 1)
+    return {
+        "requests": len(results),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed > 0 else 0.0,
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p90": float(np.percentile(latencies, 90)),
+        "latency_p99": float(np.percentile(latencies, 99)),
+        "latency_max": float(latencies.max()),
+        "error_rate": (len(results) - len(ok)) / total,
+        "statuses": statuses,
+        "degraded_rate": sum(1 for r in ok if r.degraded) / max(len(ok), 1),
+    }
+
+
+class LoadGenerator:
+    """
+    Replays images against /api/v1/verify-document.
+
+    Closed loop: a fixed number of clients each send their next request as
+    soon as the previous one returns, so the offered load follows the
+    server's speed. Open loop: requests arrive as a Poisson process at a
+    fixed rate regardless of how fast the server answers, which is how
+    queueing and shedding show up.
+    """
+
+    def __init__(self, base_url: str, images: List[Tuple[str, bytes, str]], client_timeout: float = 120.0,
+                 request_timeout: float = None, priority: str = "interactive"):
+        self.base_url = base_url.rstrip("/")
+        self.url = f"{self.base_url}/api/v1/verify-document"
+        self.images = images
+        self.client_timeout = client_timeout
+        self.headers = {"X-Priority": priority}
+        if request_timeout:
+            self.headers["X-Request-Timeout"] = str(request_timeout)
+        self._next_image = itertools.cycle(range(len(images)))
+
+    def _client(self, connections: int) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        return httpx.AsyncClient(timeout=self.client_timeout, limits=limits, trust_env=False)
+
+    async def _send(self, client: httpx.AsyncClient) -> RequestResult:
+        name, content, content_type = self.images[next(self._next_image)]
+        started = time.monotonic()
+        try:
+            response = await client.post(self.url, files={"file": (name, content, content_type)}, headers=self.headers)
+        except httpx.TimeoutException:
+            return RequestResult(started, time.monotonic() - started, 0, "client_timeout")
+        except httpx.HTTPError as e:
+            return RequestResult(started, time.monotonic() - started, 0, type(e).__name__)
+
+        latency = time.monotonic() - started
+        degraded = []
+        if response.status_code == 200:
+            degraded = response.json().get("degraded_stages", [])
+        return RequestResult(started, latency, response.status_code, degraded=degraded)
+
+    async def warm_up(self, count: int):
+        """
+        Sends a few sequential requests so model loading and connection
+        setup don't land in the first measured level.
+        """
+        async with self._client(1) as client:
+            for _ in range(count):
+                await self._send(client)
+
+    async def closed_loop(self, concurrency: int, duration: float) -> Tuple[List[RequestResult], float]:
+        results = []
+        started = time.monotonic()
+        stop_at = started + duration
+
+        async def client_loop(client):
+            while time.monotonic() < stop_at:
+                results.append(await self._send(client))
+
+        async with self._client(concurrency) as client:
+            await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        return results, time.monotonic() - started
+
+    async def open_loop(self, rate: float, duration: float, max_outstanding: int = 1000) -> Tuple[List[RequestResult], float]:
+        """
+        Sends requests with exponential inter-arrival times for `duration`
+        seconds, then waits for the stragglers. Arrivals beyond
+        max_outstanding are counted as client_overflow instead of sent.
+        """
+        results = []
+        tasks = set()
+        started = time.monotonic()
+        next_arrival = started
+
+        async def send_one(client):
+            results.append(await self._send(client))
+
+        async with self._client(max_outstanding) as client:
+            while True:
+                next_arrival += random.expovariate(rate)
+                if next_arrival - started >= duration:
+                    break
+                await asyncio.sleep(max(next_arrival - time.monotonic(), 0.0))
+
+                if len(tasks) >= max_outstanding:
+                    results.append(RequestResult(time.monotonic(), 0.0, 0, "client_overflow"))
+                    continue
+                task = asyncio.ensure_future(send_one(client))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        return results, time.monotonic() - started
+
+    async def scrape_stages(self) -> Dict[str, List[float]]:
+        async with httpx.AsyncClient(timeout=10.0, trust_env=False) as client:
+            response = await client.get(f"{self.base_url}/metrics")
+            response.raise_for_status()
+            return parse_stage_metrics(response.text)
+
+    async def run_level(self, mode: str, level: float, duration: float) -> dict:
+        """
+        Runs one load level and returns its summary plus the server-side
+        stage breakdown observed while it ran.
+        """
+        before = await self.scrape_stages()
+        if mode == "open":
+            results, elapsed = await self.open_loop(level, duration)
+        else:
+            results, elapsed = await self.closed_loop(int(level), duration)
+        after = await self.scrape_stages()
+
+        summary = summarize(results, elapsed)
+        summary["mode"] = mode
+        summary["level"] = level
+        summary["stages"] = stage_breakdown(before, after)
+        return summary
@@ -0,0 +1,208 @@
+"""
+Local stand-ins for Azure Document Intelligence and Azure OpenAI.
+
+Serves the two REST calls the pipeline makes, with configurable latency,
+throttling and failures, so the API can be load tested offline:
+
+- POST /formrecognizer/documentModels/{model}:analyze  -> 202 + Operation-Location
+  GET  /formrecognizer/documentModels/{model}/analyzeResults/{id}  -> running / succeeded
+- POST /openai/deployments/{deployment}/chat/completions
+
+Usage:
+    python -m loadtest.mock_services --port 8900 --ocr-latency 2.0 --llm-latency 1.0 --throttle-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+API_VERSION = "2023-07-31"
+OPERATION_TTL_SECONDS = 60
+
+# Canned prebuilt-idDocument fields (synthetic identity, not a real Aadhaar)
+MOCK_FIELDS = {
+    "DocumentNumber": {"type": "string", "valueString": "2345 6789 0123", "content": "2345 6789 0123", "confidence": 0.98},
+    "FirstName": {"type": "string", "valueString": "Test", "content": "Test", "confidence": 0.97},
+    "LastName": {"type": "string", "valueString": "User", "content": "User", "confidence": 0.97},
+    "DateOfBirth": {"type": "date", "valueDate": "1990-01-01", "content": "01/01/1990", "confidence": 0.95},
+    "Sex": {"type": "string", "valueString": "M", "content": "Male", "confidence": 0.96},
+    "Address": {"type": "string", "valueString": "1 Test Street, Bengaluru 560001",
+                "content": "1 Test Street, Bengaluru 560001", "confidence": 0.9},
+}
+
+
+class FaultProfile:
+    """
+    Latency and fault model of one mocked service.
+
+    Latency is lognormal with the given median and shape (sigma); each
+    request is independently throttled (429 with Retry-After) or failed
+    (500) with the given probabilities.
+    """
+
+    def __init__(self, median_latency: float, sigma: float = 0.5, throttle_rate: float = 0.0,
+                 error_rate: float = 0.0, retry_after: int = 1):
+        self.median_latency = median_latency
+        self.sigma = sigma
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+
+    def sample_latency(self) -> float:
+        if self.median_latency <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median_latency), self.sigma)
+
+    def fault_response(self) -> Response:
+        """
+        Returns a 429/500 response for a request that should fail, else None.
+        """
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return JSONResponse(
+                {"error": {"code": "429", "message": "Rate limit is exceeded. Try again later."}},
+                status_code=429,
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        if roll < self.throttle_rate + self.error_rate:
+            return JSONResponse({"error": {"code": "InternalServerError", "message": "Mock failure."}}, status_code=500)
+        return None
+
+
+def _analyze_result(model_id: str) -> dict:
+    return {
+        "apiVersion": API_VERSION,
+        "modelId": model_id,
+        "stringIndexType": "textElements",
+        "content": "",
+        "pages": [],
+        "documents": [{
+            "docType": "idDocument.nationalIdentityCard",
+            "boundingRegions": [],
+            "fields": MOCK_FIELDS,
+            "confidence": 0.97,
+            "spans": [],
+        }],
+    }
+
+
+def _echo_json(messages: list) -> str:
+    """
+    The refiner asks for corrected JSON; answer with the JSON embedded in the prompt.
+    """
+    content = messages[-1].get("content", "") if messages else ""
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end <= start:
+        return "{}"
+    try:
+        return json.dumps(json.loads(content[start:end + 1]))
+    except ValueError:
+        return "{}"
+
+
+def create_app(ocr: FaultProfile, llm: FaultProfile, poll_interval: float = 0.25) -> FastAPI:
+    """
+    Builds the mock server. OCR latency is simulated by when the operation
+    reports success, so pending operations cost no server resources.
+    """
+    app = FastAPI(title="Azure mocks")
+    operations = {}
+
+    @app.post("/formrecognizer/documentModels/{model_id}:analyze")
+    async def analyze(model_id: str, request: Request):
+        await request.body()
+        fault = ocr.fault_response()
+        if fault is not None:
+            return fault
+
+        # Forget operations whose client gave up (e.g. on its deadline)
+        now = time.monotonic()
+        for stale in [op for op, (ready_at, _) in operations.items() if now - ready_at > OPERATION_TTL_SECONDS]:
+            del operations[stale]
+
+        operation_id = uuid.uuid4().hex
+        operations[operation_id] = (now + ocr.sample_latency(), model_id)
+        location = f"{str(request.base_url).rstrip('/')}/formrecognizer/documentModels/{model_id}" \
+                   f"/analyzeResults/{operation_id}?api-version={API_VERSION}"
+        return Response(status_code=202, headers={"Operation-Location": location, "apim-request-id": operation_id})
+
+    @app.get("/formrecognizer/documentModels/{model_id}/analyzeResults/{operation_id}")
+    async def analyze_result(model_id: str, operation_id: str):
+        if operation_id not in operations:
+            return JSONResponse({"error": {"code": "NotFound", "message": "Unknown operation."}}, status_code=404)
+
+        ready_at, _ = operations[operation_id]
+        remaining = ready_at - time.monotonic()
+        if remaining > 0:
+            # The SDK polls again after retry-after-ms
+            wait_ms = int(min(remaining, poll_interval) * 1000) + 1
+            return JSONResponse({"status": "running"}, headers={"retry-after-ms": str(wait_ms)})
+
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        return JSONResponse({
+            "status": "succeeded",
+            "createdDateTime": now,
+            "lastUpdatedDateTime": now,
+            "analyzeResult": _analyze_result(model_id),
+        })
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        fault = llm.fault_response()
+        if fault is not None:
+            return fault
+
+        await asyncio.sleep(llm.sample_latency())
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": deployment,
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": _echo_json(body.get("messages", []))},
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--ocr-latency", type=float, default=2.0, help="Median OCR latency (seconds)")
+    parser.add_argument("--ocr-sigma", type=float, default=0.4, help="Lognormal shape of OCR latency")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Median LLM latency (seconds)")
+    parser.add_argument("--llm-sigma", type=float, default=0.5, help="Lognormal shape of LLM latency")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 500")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+
+
+def profiles_from_args(args) -> tuple:
+    ocr = FaultProfile(args.ocr_latency, args.ocr_sigma, args.throttle_rate, args.error_rate, args.retry_after)
+    llm = FaultProfile(args.llm_latency, args.llm_sigma, args.throttle_rate, args.error_rate, args.retry_after)
+    return ocr, llm
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve mock Azure Document Intelligence and Azure OpenAI endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    ocr, llm = profiles_from_args(args)
+    uvicorn.run(create_app(ocr, llm), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
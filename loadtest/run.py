@@ -0,0 +1,169 @@
+"""
+Load tests the verification API against local Azure stand-ins.
+
+Sweeps a list of load levels (requests/second in open-loop mode, concurrent
+clients in closed-loop mode) and prints throughput, latency percentiles,
+error rates and the server-side stage breakdown for each level.
+
+Usage:
+    python -m loadtest.run --spawn --mode open --levels 1,2,4,8 --duration 30
+    python -m loadtest.run --api-url http://127.0.0.1:8000 --mode closed --levels 1,4,16
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import List
+import httpx
+from loadtest.generator import LoadGenerator, load_images
+from loadtest.mock_services import add_profile_arguments
+
+STAGE_ORDER = ["admission_wait", "rectify", "preprocess", "quality", "yolo", "anomaly", "qr_decode", "qr_verify",
+               "ocr", "llm"]
+
+
+def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode} before becoming ready")
+        try:
+            httpx.get(url, timeout=1.0, trust_env=False)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    raise RuntimeError(f"{url} did not become ready within {timeout:.0f}s")
+
+
+def _spawn(stack: ExitStack, args: list, env: dict, ready_url: str, timeout: float) -> subprocess.Popen:
+    process = subprocess.Popen([sys.executable] + args, env=env)
+
+    def stop():
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    stack.callback(stop)
+    _wait_until_ready(ready_url, process, timeout)
+    return process
+
+
+def spawn_stack(stack: ExitStack, args) -> str:
+    """
+    Starts the mock services and a single-worker API pointed at them.
+    Returns the API base URL.
+    """
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    scratch = stack.enter_context(tempfile.TemporaryDirectory(prefix="loadtest-"))
+
+    mock_args = ["-m", "loadtest.mock_services", "--port", str(args.mock_port),
+                 "--ocr-latency", str(args.ocr_latency), "--ocr-sigma", str(args.ocr_sigma),
+                 "--llm-latency", str(args.llm_latency), "--llm-sigma", str(args.llm_sigma),
+                 "--throttle-rate", str(args.throttle_rate), "--error-rate", str(args.error_rate),
+                 "--retry-after", str(args.retry_after)]
+    _spawn(stack, mock_args, dict(os.environ), f"{mock_url}/docs", args.startup_timeout)
+
+    env = dict(os.environ)
+    env.update({
+        "AZURE_FORM_RECOGNIZER_ENDPOINT": mock_url,
+        "AZURE_FORM_RECOGNIZER_KEY": "mock",
+        "AZURE_OPENAI_ENDPOINT": mock_url,
+        "AZURE_OPENAI_KEY": "mock",
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "mock",
+        # Keep load test traffic out of the real stage store and logs
+        "STAGE_STORE_PATH": os.path.join(scratch, "stage_outputs"),
+        "LOG_FILE_PATH": os.path.join(scratch, "app.log"),
+        "NO_PROXY": "127.0.0.1,localhost",
+    })
+    # One worker, so /metrics covers every request
+    api_args = ["-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(args.api_port),
+                "--log-level", "warning"]
+    _spawn(stack, api_args, env, f"{api_url}/", args.startup_timeout)
+    return api_url
+
+
+def format_report(levels: List[dict]) -> str:
+    """
+    One row per load level, then the mean seconds per stage at each level.
+    """
+    unit = "rps" if levels and levels[0]["mode"] == "open" else "clients"
+    lines = [f"{unit:>8}{'sent':>7}{'ok/s':>8}{'p50':>8}{'p90':>8}{'p99':>8}{'err%':>7}{'degr%':>7}  statuses"]
+    for level in levels:
+        statuses = " ".join(f"{k}:{v}" for k, v in sorted(level["statuses"].items()))
+        lines.append(
+            f"{level['level']:>8g}{level['requests']:>7}{level['throughput_rps']:>8.2f}"
+            f"{level['latency_p50']:>8.2f}{level['latency_p90']:>8.2f}{level['latency_p99']:>8.2f}"
+            f"{level['error_rate'] * 100:>7.1f}{level['degraded_rate'] * 100:>7.1f}  {statuses}"
+        )
+
+    stages = [s for s in STAGE_ORDER if any(s in level["stages"] for level in levels)]
+    stages += sorted({s for level in levels for s in level["stages"]} - set(stages))
+    if stages:
+        lines.append("")
+        lines.append("mean stage seconds")
+        widths = [max(len(s), 7) + 2 for s in stages]
+        lines.append(f"{unit:>8}" + "".join(f"{s:>{w}}" for s, w in zip(stages, widths)))
+        for level in levels:
+            lines.append(f"{level['level']:>8g}" + "".join(
+                f"{level['stages'][s]:>{w}.3f}" if s in level["stages"] else f"{'-':>{w}}"
+                for s, w in zip(stages, widths)
+            ))
+    return "\n".join(lines)
+
+
+async def sweep(generator: LoadGenerator, mode: str, levels: List[float], duration: float, warmup: int) -> List[dict]:
+    await generator.warm_up(warmup)
+
+    reports = []
+    for level in levels:
+        report = await generator.run_level(mode, level, duration)
+        print(f"{mode} {level:g}: {report['throughput_rps']:.2f} ok/s, p99 {report['latency_p99']:.2f}s, "
+              f"errors {report['error_rate'] * 100:.1f}%", flush=True)
+        reports.append(report)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/v1/verify-document against local Azure mocks.")
+    parser.add_argument("--api-url", default=None, help="API to test (default: the one started by --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="Start the mock services and the API locally")
+    parser.add_argument("--api-port", type=int, default=8000)
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--startup-timeout", type=float, default=120.0, help="Seconds to wait for spawned servers")
+    parser.add_argument("--images", default="data/test/images", help="Directory of images to replay")
+    parser.add_argument("--mode", choices=("open", "closed"), default="closed")
+    parser.add_argument("--levels", default="1,2,4,8",
+                        help="Comma-separated requests/second (open) or concurrent clients (closed)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per load level")
+    parser.add_argument("--warmup", type=int, default=2, help="Requests sent before measuring")
+    parser.add_argument("--request-timeout", type=float, default=None, help="X-Request-Timeout header to send")
+    parser.add_argument("--priority", default="interactive", help="X-Priority header to send")
+    parser.add_argument("--output", default=None, help="Also write the results as JSON to this file")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    levels = [float(level) for level in args.levels.split(",") if level.strip()]
+    images = load_images(args.images)
+
+    with ExitStack() as stack:
+        api_url = spawn_stack(stack, args) if args.spawn else (args.api_url or "http://127.0.0.1:8000")
+        generator = LoadGenerator(api_url, images, request_timeout=args.request_timeout, priority=args.priority)
+        reports = asyncio.run(sweep(generator, args.mode, levels, args.duration, args.warmup))
+
+    print()
+    print(format_report(reports))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
+import time
 from azure.ai.formrecognizer import DocumentAnalysisClient
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import ServiceRequestTimeoutError, ServiceResponseTimeoutError
 from utils.config import settings
 from utils.logger import app_logger
 
@@ -21,18 +23,37 @@ class AzureOCR:
                 credential=AzureKeyCredential(self.key)
             )
 
-    def analyze_document(self, document_content: bytes) -> dict:
+    def analyze_document(self, document_content: bytes, timeout: float = None) -> dict:
         """
         Analyze document using the prebuilt-idDocument model.
+        With a timeout (seconds), gives up with TimeoutError once it has passed,
+        including when the submit or a poll request itself times out.
         """
         if not self.client:
             raise ValueError("Azure OCR client is not initialized.")
 
+        if timeout is not None and timeout <= 0:
+            raise TimeoutError("No time left for Azure OCR")
+
         try:
-            poller = self.client.begin_analyze_document(
-                "prebuilt-idDocument", document=document_content
-            )
-            result = poller.result()
+            # Bounds each HTTP attempt of the submit request (the SDK reserves
+            # the `timeout` keyword of this call for the polling interval)
+            options = {} if timeout is None else {"connection_timeout": timeout, "read_timeout": timeout}
+            started = time.monotonic()
+            try:
+                poller = self.client.begin_analyze_document(
+                    "prebuilt-idDocument", document=document_content, **options
+                )
+                if timeout is None:
+                    result = poller.result()
+                else:
+                    poller.wait(timeout=max(timeout - (time.monotonic() - started), 0.0))
+                    if not poller.done():
+                        raise TimeoutError(f"Azure OCR did not finish within {timeout:.1f}s")
+                    result = poller.result()
+            except (ServiceRequestTimeoutError, ServiceResponseTimeoutError) as e:
+                # azure-core's own timeout errors are not TimeoutError subclasses
+                raise TimeoutError(f"Azure OCR request timed out: {e}") from e
             
             extracted_data = []
             
@@ -55,5 +76,5 @@ class AzureOCR:
             return {"documents": extracted_data, "raw_result": result}
             
         except Exception as e:
-            app_logger.error(f"Error analyzing document with Azure OCR: {e}")
+            app_logger.error("Error analyzing document with Azure OCR: {}", e)
             raise
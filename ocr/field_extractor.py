@@ -1,5 +1,5 @@
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List
 from utils.logger import app_logger
 
 class FieldExtractor:
@@ -25,9 +25,9 @@ class FieldExtractor:
             if not ocr_result.get("documents"):
                 return extracted
                 
-            # Assuming single document for now
-            doc = ocr_result["documents"][0]
-            fields = doc.get("fields", {})
+            # Front and back (or several PDF pages) come back as separate
+            # documents; merge them, keeping the most confident value per field.
+            fields = FieldExtractor.merge_document_fields(ocr_result["documents"])
             
             # Map Azure prebuilt-idDocument fields to our schema
             # Note: Azure might map these differently depending on the model version
@@ -57,9 +57,25 @@ class FieldExtractor:
             return extracted
             
         except Exception as e:
-            app_logger.error(f"Error extracting fields: {e}")
+            app_logger.error("Error extracting fields: {}", e)
             return extracted
 
+    @staticmethod
+    def merge_document_fields(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merges the fields of several OCR documents, keeping the value with the
+        highest confidence when a field appears on more than one page.
+        """
+        merged = {}
+        for doc in documents:
+            for name, field in doc.get("fields", {}).items():
+                if not field.get("value"):
+                    continue
+                current = merged.get(name)
+                if current is None or (field.get("confidence") or 0.0) > (current.get("confidence") or 0.0):
+                    merged[name] = field
+        return merged
+
     @staticmethod
     def normalize_aadhaar(aadhaar_num: str) -> str:
         """
@@ -0,0 +1,165 @@
+import os
+import zlib
+import cv2
+import numpy as np
+from utils.config import settings
+from utils.logger import app_logger
+
+
+class SecureQRDecoder:
+    """
+    Offline reader for the UIDAI secure QR code printed on Aadhaar cards.
+
+    The QR holds a big decimal integer; its bytes are a gzip stream whose
+    content is 0xFF-separated ISO-8859-1 fields, the holder photo, and a
+    trailing 256-byte RSA-SHA256 signature over everything before it.
+    """
+
+    SIGNATURE_SIZE = 256
+    DELIMITER = b"\xff"
+
+    # Numeric capacity of the largest (version 40) QR code
+    MAX_PAYLOAD_DIGITS = 7089
+
+    # Text fields plus a small JPEG photo; anything larger is not a real card
+    MAX_DECOMPRESSED_BYTES = 64 * 1024
+
+    # Python refuses str -> int conversions above 4300 digits; convert in chunks below that
+    DIGIT_CHUNK = 4000
+
+    # Text fields in payload order (after the optional version marker)
+    FIELDS = [
+        "email_mobile_indicator", "reference_id", "name", "dob", "gender",
+        "care_of", "district", "landmark", "house", "location", "pincode",
+        "post_office", "state", "street", "sub_district", "vtc",
+    ]
+
+    ADDRESS_FIELDS = [
+        "house", "street", "landmark", "location", "vtc", "post_office",
+        "sub_district", "district", "state", "pincode",
+    ]
+
+    _public_key = None
+
+    @staticmethod
+    def decode_image(image: np.ndarray, bbox: list = None, margin: float = 0.1) -> str:
+        """
+        Locates and decodes a QR code, optionally only inside bbox (x1, y1, x2, y2).
+        Returns the raw payload text, or None.
+        """
+        try:
+            if bbox is not None:
+                x1, y1, x2, y2 = bbox
+                pad_x, pad_y = (x2 - x1) * margin, (y2 - y1) * margin
+                h, w = image.shape[:2]
+                image = image[max(int(y1 - pad_y), 0):min(int(y2 + pad_y), h),
+                              max(int(x1 - pad_x), 0):min(int(x2 + pad_x), w)]
+
+            text, _, _ = cv2.QRCodeDetector().detectAndDecode(image)
+            return text or None
+        except Exception as e:
+            app_logger.error("Error decoding QR code: {}", e)
+            return None
+
+    @staticmethod
+    def load_public_key():
+        """
+        Loads the UIDAI signing certificate (PEM or DER) from UIDAI_CERT_PATH.
+        """
+        if SecureQRDecoder._public_key is None:
+            from cryptography import x509
+
+            with open(settings.UIDAI_CERT_PATH, "rb") as f:
+                data = f.read()
+            if b"-----BEGIN CERTIFICATE-----" in data:
+                cert = x509.load_pem_x509_certificate(data)
+            else:
+                cert = x509.load_der_x509_certificate(data)
+            SecureQRDecoder._public_key = cert.public_key()
+        return SecureQRDecoder._public_key
+
+    @staticmethod
+    def verify_signature(signed: bytes, signature: bytes) -> bool:
+        try:
+            from cryptography.hazmat.primitives import hashes
+            from cryptography.hazmat.primitives.asymmetric import padding
+
+            SecureQRDecoder.load_public_key().verify(signature, signed, padding.PKCS1v15(), hashes.SHA256())
+            return True
+        except FileNotFoundError:
+            app_logger.warning("UIDAI certificate not found at {}; secure QR cannot be verified", settings.UIDAI_CERT_PATH)
+            return False
+        except Exception as e:
+            app_logger.warning("Secure QR signature verification failed: {}", e)
+            return False
+
+    @staticmethod
+    def parse(payload: str) -> dict:
+        """
+        Decompresses and parses a secure QR payload.
+        Returns the fields in the FieldExtractor schema plus a `signature_valid` flag,
+        or None if the payload is not a secure QR.
+        """
+        digits = payload.strip()
+        if not digits.isdigit():
+            # Ordinary (non-secure) QR codes, e.g. the old XML format
+            app_logger.info("QR code is not a secure QR payload")
+            return None
+        if len(digits) > SecureQRDecoder.MAX_PAYLOAD_DIGITS:
+            app_logger.warning("Secure QR payload too large ({} digits)", len(digits))
+            return None
+
+        try:
+            number = SecureQRDecoder._digits_to_int(digits)
+            compressed = number.to_bytes((number.bit_length() + 7) // 8, "big")
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            raw = decompressor.decompress(compressed, SecureQRDecoder.MAX_DECOMPRESSED_BYTES)
+            if decompressor.unconsumed_tail:
+                raise ValueError(f"decompresses to more than {SecureQRDecoder.MAX_DECOMPRESSED_BYTES} bytes")
+        except (ValueError, zlib.error) as e:
+            app_logger.warning("Could not decompress secure QR payload: {}", e)
+            return None
+
+        if len(raw) <= SecureQRDecoder.SIGNATURE_SIZE:
+            app_logger.warning("Secure QR payload too short to carry a signature")
+            return None
+        signed, signature = raw[:-SecureQRDecoder.SIGNATURE_SIZE], raw[-SecureQRDecoder.SIGNATURE_SIZE:]
+
+        # V2+ payloads start with a version marker; the photo after the text
+        # fields may itself contain 0xFF bytes, so never split past them.
+        has_version = signed[:1] == b"V"
+        count = len(SecureQRDecoder.FIELDS) + (1 if has_version else 0)
+        parts = signed.split(SecureQRDecoder.DELIMITER, count)
+        if len(parts) <= count:
+            app_logger.warning("Secure QR payload has {} fields, expected more than {}", len(parts), count)
+            return None
+
+        values = [p.decode("iso-8859-1").strip() for p in parts[:count]]
+        if has_version:
+            values = values[1:]
+        raw_fields = dict(zip(SecureQRDecoder.FIELDS, values))
+
+        last_four = raw_fields["reference_id"][:4]
+        address = ", ".join(raw_fields[f] for f in SecureQRDecoder.ADDRESS_FIELDS if raw_fields[f])
+
+        return {
+            "aadhaar_number": f"XXXX XXXX {last_four}" if last_four.isdigit() else None,
+            "name": raw_fields["name"] or None,
+            "dob": raw_fields["dob"] or None,
+            "gender": raw_fields["gender"] or None,
+            "address": address or None,
+            "pincode": raw_fields["pincode"] or None,
+            "signature_valid": SecureQRDecoder.verify_signature(signed, signature),
+        }
+
+    @staticmethod
+    def _digits_to_int(digits: str) -> int:
+        number = 0
+        for start in range(0, len(digits), SecureQRDecoder.DIGIT_CHUNK):
+            chunk = digits[start:start + SecureQRDecoder.DIGIT_CHUNK]
+            number = number * 10 ** len(chunk) + int(chunk)
+        return number
+
+    @staticmethod
+    def certificate_available() -> bool:
+        return os.path.exists(settings.UIDAI_CERT_PATH)
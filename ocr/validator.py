@@ -11,10 +11,15 @@ class Validator:
     def validate_aadhaar_number(aadhaar_num: str) -> bool:
         """
         Validates Aadhaar number format (12 digits) and Verhoeff algorithm (simplified here).
+        Masked numbers (XXXX XXXX 1234, as carried by the secure QR) only have
+        their last four digits checked.
         """
         if not aadhaar_num:
             return False
             
+        if re.fullmatch(r'[Xx]{8}\d{4}', re.sub(r'[\s-]', '', aadhaar_num)):
+            return True
+            
         clean_num = re.sub(r'\D', '', aadhaar_num)
         
         if len(clean_num) != 12:
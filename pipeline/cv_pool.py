@@ -0,0 +1,361 @@
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+import cv2
+import numpy as np
+from utils.config import settings
+from utils.deadline import Deadline
+from utils import logger as log
+from utils.logger import app_logger, forward_logs_to, request_id_var
+from utils.metrics import metrics
+
+
+def _decode(buffer, size: int) -> np.ndarray:
+    image = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8, count=size), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode uploaded image")
+    return image
+
+
+def _worker_main(slot_names: dict, task_queue, result_queue, log_queue, cpu: int, runner_factory=None):
+    """
+    Entry point of a pool process: loads the models once, then serves tasks
+    for the shared memory slots it owns. `runner_factory` replaces
+    CVStageRunner (it must be importable by the spawned process).
+    """
+    # Only the parent writes the log file; rotating it from N processes would clobber it
+    forward_logs_to(log_queue)
+
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+
+    # One process per core already; avoid oversubscribing with intra-op threads
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    if runner_factory is None:
+        from pipeline.cv_stages import CVStageRunner
+        runner_factory = CVStageRunner
+    runner = runner_factory()
+
+    # Spawned workers share the parent's resource tracker, so attaching here
+    # does not transfer ownership: the parent still unlinks the segments.
+    slots = {index: SharedMemory(name=name) for index, name in slot_names.items()}
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, slot_index, size, deadline, request_id = task
+        shm = slots[slot_index]
+        token = request_id_var.set(request_id)
+        try:
+            card_img, report = runner.run(_decode(shm.buf, size), deadline)
+            if card_img.nbytes > shm.size:
+                raise ValueError("Rectified image does not fit in the shared memory slot")
+
+            # Write the result back over the (already decoded) input
+            out = np.ndarray(card_img.shape, dtype=card_img.dtype, buffer=shm.buf)
+            out[...] = card_img
+            del out
+            result_queue.put((task_id, (card_img.shape, card_img.dtype.str), report, None))
+        except Exception as e:
+            result_queue.put((task_id, None, None, f"{type(e).__name__}: {e}"))
+        finally:
+            request_id_var.reset(token)
+
+    for shm in slots.values():
+        shm.close()
+
+
+class _Task:
+    __slots__ = ("future", "slot", "worker", "abandoned")
+
+    def __init__(self, future: Future, slot: int, worker: int):
+        self.future = future
+        self.slot = slot
+        self.worker = worker
+        self.abandoned = False
+
+
+class SharedMemoryCVPool:
+    """
+    Persistent process pool for the CV stages.
+
+    Images travel through a ring of pre-allocated shared memory slots instead
+    of being pickled: the parent copies the encoded upload into a free slot,
+    the worker decodes it, runs the stages and writes the rectified card back
+    into the same slot, and the parent reads it as a NumPy view. Each slot is
+    owned by one worker, so a worker always touches the same segments and
+    (optionally) runs pinned to its own core. Models are loaded once per worker.
+    Each task goes to the worker with the most free slots, i.e. the fewest
+    tasks in flight, so concurrent requests spread across the cores.
+
+    The collector also watches the workers: when one dies (OOM kill, crash in
+    native code) its pending tasks fail immediately, abandoned slots are
+    freed, and a replacement process is started on the same slots.
+    """
+
+    # Seconds between worker liveness checks
+    MONITOR_INTERVAL = 1.0
+
+    def __init__(self,
+                 workers: int = settings.CV_POOL_WORKERS,
+                 slots_per_worker: int = settings.CV_POOL_SLOTS_PER_WORKER,
+                 slot_bytes: int = settings.CV_POOL_SLOT_MB * 1024 * 1024,
+                 pin_cpus: bool = settings.CV_POOL_PIN_CPUS,
+                 runner_factory=None):
+        self.workers = workers
+        self.slots_per_worker = slots_per_worker
+        self.slot_bytes = slot_bytes
+        self.pin_cpus = pin_cpus
+        self.runner_factory = runner_factory
+
+        self._slots = []
+        self._free = []  # free slot indexes, one list per worker
+        self._free_cond = threading.Condition()
+        self._task_queues = []
+        self._processes = []
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._ctx = None
+        self._worker_args = []
+        self._closing = False
+        self._result_queue = None
+        self._log_queue = None
+        self._collector = None
+        self._log_forwarder = None
+
+        metrics.describe("cv_pool_free_slots", "gauge", "Shared memory slots not currently in use.")
+        metrics.describe("cv_pool_worker_restarts_total", "counter", "CV workers replaced after dying.")
+
+    def start(self):
+        self._ctx = mp.get_context("spawn")
+        self._result_queue = self._ctx.Queue()
+        self._log_queue = self._ctx.Queue()
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+
+        for worker in range(self.workers):
+            slot_names = {}
+            self._free.append([])
+            for _ in range(self.slots_per_worker):
+                shm = SharedMemory(create=True, size=self.slot_bytes)
+                index = len(self._slots)
+                self._slots.append((shm, worker))
+                slot_names[index] = shm.name
+                self._free[worker].append(index)
+
+            cpu = cpus[worker % len(cpus)] if self.pin_cpus and cpus else None
+            self._worker_args.append((slot_names, cpu))
+            self._task_queues.append(None)
+            self._processes.append(None)
+            self._spawn_worker(worker)
+
+        self._collector = threading.Thread(target=self._collect, name="cv-pool-collector", daemon=True)
+        self._collector.start()
+        self._log_forwarder = threading.Thread(target=self._forward_logs, name="cv-pool-logs", daemon=True)
+        self._log_forwarder.start()
+        metrics.set_gauge("cv_pool_free_slots", self.free_slots())
+        app_logger.info("Started CV pool with {} workers x {} slots", self.workers, self.slots_per_worker)
+
+    def _spawn_worker(self, worker: int):
+        """
+        Starts (or replaces) the process serving a worker's slots, with a
+        fresh task queue so nothing queued for a dead process is replayed.
+        """
+        slot_names, cpu = self._worker_args[worker]
+        task_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(slot_names, task_queue, self._result_queue, self._log_queue, cpu, self.runner_factory),
+            name=f"cv-worker-{worker}",
+            daemon=True
+        )
+        process.start()
+        self._task_queues[worker] = task_queue
+        self._processes[worker] = process
+
+    def _check_workers(self):
+        for worker, process in enumerate(self._processes):
+            if self._closing or process.is_alive():
+                continue
+
+            app_logger.error("CV worker {} died (exit code {}), restarting it", worker, process.exitcode)
+            metrics.inc("cv_pool_worker_restarts_total")
+            with self._lock:
+                # Holding the lock keeps process() from queueing to the dead worker meanwhile
+                dead = [(task_id, task) for task_id, task in self._tasks.items() if task.worker == worker]
+                for task_id, task in dead:
+                    del self._tasks[task_id]
+                    if task.abandoned:
+                        self._release(task.slot)
+                    else:
+                        task.future.set_exception(RuntimeError(f"CV worker {worker} died"))
+                self._spawn_worker(worker)
+
+    def _collect(self):
+        next_check = time.monotonic() + self.MONITOR_INTERVAL
+        while True:
+            # Checked on a timer too, so a busy result queue can't hide a dead worker
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + self.MONITOR_INTERVAL
+            try:
+                message = self._result_queue.get(timeout=self.MONITOR_INTERVAL)
+            except queue.Empty:
+                continue
+            if message is None:
+                break
+
+            task_id, layout, report, error = message
+            with self._lock:
+                task = self._tasks.pop(task_id, None)
+            if task is None:
+                continue
+            if task.abandoned:
+                self._release(task.slot)
+            elif error:
+                task.future.set_exception(RuntimeError(error))
+            else:
+                task.future.set_result((layout, report))
+
+    def _forward_logs(self):
+        while True:
+            payload = self._log_queue.get()
+            if payload is None:
+                break
+            log.log_sink.submit(payload)
+
+    def free_slots(self) -> int:
+        with self._free_cond:
+            return sum(len(free) for free in self._free)
+
+    def _acquire(self, timeout: float = None) -> int:
+        """
+        Takes a free slot from the least busy worker, waiting up to `timeout`
+        seconds for one to be released.
+        """
+        with self._free_cond:
+            if not self._free_cond.wait_for(lambda: any(self._free), timeout=timeout):
+                raise TimeoutError("No free CV pool slot")
+            slot = max(self._free, key=len).pop()
+            free = sum(len(f) for f in self._free)
+        metrics.set_gauge("cv_pool_free_slots", free)
+        return slot
+
+    def _release(self, slot: int):
+        with self._free_cond:
+            self._free[self._slots[slot][1]].append(slot)
+            free = sum(len(f) for f in self._free)
+            self._free_cond.notify()
+        metrics.set_gauge("cv_pool_free_slots", free)
+
+    def _wait(self, task_id: int, task: _Task, timeout: float = None):
+        try:
+            return task.future.result(timeout=timeout)
+        except TimeoutError:
+            with self._lock:
+                if task_id in self._tasks:
+                    # The worker still owns the slot; the collector frees it later
+                    task.abandoned = True
+                    raise
+        # The collector settled the task while we were timing out
+        return task.future.result()
+
+    @contextmanager
+    def process(self, data: bytes, timeout: float = None, deadline: Deadline = None):
+        """
+        Runs the CV stages on an encoded image and yields (card image, report).
+        The card image is a view into shared memory and is only valid inside
+        the with-block; copy it if it must outlive the block. The deadline is
+        sent to the worker, which skips optional stages when it is close.
+        """
+        if len(data) > self.slot_bytes:
+            raise ValueError("Upload exceeds the CV pool slot size")
+
+        slot = self._acquire(timeout)
+        shm, worker = self._slots[slot]
+        shm.buf[:len(data)] = data
+
+        task_id = next(self._ids)
+        task = _Task(Future(), slot, worker)
+        with self._lock:
+            self._tasks[task_id] = task
+            self._task_queues[worker].put((task_id, slot, len(data), deadline, request_id_var.get()))
+
+        try:
+            (shape, dtype), report = self._wait(task_id, task, timeout)
+        except Exception:
+            if not task.abandoned:
+                self._release(slot)
+            raise
+
+        card_img = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        try:
+            yield card_img, report
+        finally:
+            del card_img
+            self._release(slot)
+
+    def close(self):
+        self._closing = True
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        if self._result_queue is not None:
+            self._result_queue.put(None)
+        if self._log_queue is not None:
+            self._log_queue.put(None)
+        for shm, _ in self._slots:
+            shm.close()
+            shm.unlink()
+        self._slots = []
+
+
+class InlineCVExecutor:
+    """
+    Runs the CV stages in the calling thread (CV_POOL_WORKERS=0).
+    The models are not thread-safe, so concurrent calls are serialized.
+    """
+
+    def __init__(self):
+        self._runner = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        from pipeline.cv_stages import CVStageRunner
+        self._runner = CVStageRunner()
+
+    @contextmanager
+    def process(self, data: bytes, timeout: float = None, deadline: Deadline = None):
+        image = _decode(data, len(data))
+        with self._lock:
+            result = self._runner.run(image, deadline)
+        yield result
+
+    def close(self):
+        pass
+
+
+def create_cv_executor():
+    if settings.CV_POOL_WORKERS > 0:
+        return SharedMemoryCVPool()
+    return InlineCVExecutor()
+
+
+cv_executor = create_cv_executor()
@@ -0,0 +1,88 @@
+import time
+import numpy as np
+from preprocessing.rectify import CardRectifier
+from preprocessing.image_cleaner import ImageCleaner
+from preprocessing.quality_metrics import QualityMetrics
+from fraud_detection.yolo_detector import YoloDetector
+from fraud_detection.anomaly_model import AnomalyModel
+from ocr.secure_qr import SecureQRDecoder
+from utils.config import settings
+from utils.deadline import Deadline
+
+
+class CVStageRunner:
+    """
+    Runs the CPU-bound computer vision stages for one decoded image.
+    Holds the YOLO and anomaly models, so create one per process.
+    """
+
+    def __init__(self):
+        self.yolo_detector = YoloDetector()
+        self.anomaly_model = AnomalyModel()
+
+    def run(self, image: np.ndarray, deadline: Deadline = None) -> tuple:
+        """
+        Returns (rectified card image, report) where report holds the
+        rectification, quality, YOLO and anomaly results, the raw secure QR
+        payload (if decoded), per-stage timings and the stages degraded to
+        meet the deadline.
+        """
+        deadline = deadline or Deadline(settings.REQUEST_TIMEOUT_MAX_SECONDS)
+        timings = {}
+
+        # Tasks can sit in a pool queue; don't start on one nobody waits for
+        deadline.check("rectify")
+        started = time.perf_counter()
+        card_img, rectification, transform = CardRectifier.rectify(image)
+        timings["rectify"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        full_denoise = deadline.allows("denoise", settings.DEADLINE_MIN_DENOISE_SECONDS)
+        clean_img = ImageCleaner.clean_image(card_img, fast=not full_denoise)
+        timings["preprocess"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        quality_report = QualityMetrics.assess_quality(clean_img)
+        timings["quality"] = time.perf_counter() - started
+
+        deadline.check("yolo")
+        started = time.perf_counter()
+        yolo_result = self.yolo_detector.detect_fraud_features(card_img)
+        timings["yolo"] = time.perf_counter() - started
+
+        anomaly_score = 0.0
+        if deadline.allows("anomaly", settings.DEADLINE_MIN_ANOMALY_SECONDS):
+            started = time.perf_counter()
+            anomaly_score = self.anomaly_model.predict_anomaly(clean_img)
+            timings["anomaly"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        qr_payload = self.read_qr(image, card_img, transform, yolo_result["detections"])
+        timings["qr_decode"] = time.perf_counter() - started
+
+        return card_img, {
+            "rectification": rectification,
+            "quality": quality_report,
+            "yolo": yolo_result,
+            "anomaly_score": anomaly_score,
+            "qr_payload": qr_payload,
+            "timings": timings,
+            "degraded": deadline.degraded,
+        }
+
+    @staticmethod
+    def read_qr(image: np.ndarray, card_img: np.ndarray, transform: np.ndarray, detections: list) -> str:
+        """
+        Decodes the secure QR at full resolution, using the YOLO QR box
+        (card image coordinates) as a crop hint when there is one.
+        """
+        if not settings.SECURE_QR_ENABLED or not SecureQRDecoder.certificate_available():
+            # An unverifiable QR can't replace OCR, so don't spend time decoding it
+            return None
+
+        boxes = [d["bbox"] for d in detections if d["class"] == "qr_code"]
+        if boxes and transform is not None:
+            return SecureQRDecoder.decode_image(CardRectifier.warp_region(image, transform, boxes[0]))
+        if boxes:
+            return SecureQRDecoder.decode_image(card_img, bbox=boxes[0])
+        return SecureQRDecoder.decode_image(image)
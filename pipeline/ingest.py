@@ -0,0 +1,99 @@
+import contextvars
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List
+from PIL import Image
+from utils.config import settings
+
+
+class PDFPasswordError(Exception):
+    """
+    Raised for an encrypted PDF when no password, or a wrong one, was given.
+    """
+
+
+class DocumentIngest:
+    """
+    Turns uploaded files (images or multi-page PDFs) into a stream of page images.
+    """
+
+    PDF_SUFFIXES = (".pdf",)
+
+    @staticmethod
+    def is_pdf(path: str) -> bool:
+        if os.path.splitext(path)[1].lower() in DocumentIngest.PDF_SUFFIXES:
+            return True
+        with open(path, "rb") as f:
+            return f.read(5) == b"%PDF-"
+
+    @staticmethod
+    def iter_pages(paths: Iterable[str], dpi: int = settings.INGEST_PDF_DPI,
+                   max_pages: int = settings.INGEST_MAX_PAGES, password: str = None) -> Iterator[bytes]:
+        """
+        Yields one encoded image per page across all files, in order.
+        PDF pages are rasterized lazily, one at a time, at the given DPI.
+        Encrypted PDFs, such as downloaded e-Aadhaar, are opened with `password`.
+        """
+        emitted = 0
+        for path in paths:
+            if emitted >= max_pages:
+                return
+
+            if not DocumentIngest.is_pdf(path):
+                with open(path, "rb") as f:
+                    yield f.read()
+                emitted += 1
+                continue
+
+            try:
+                import fitz  # PyMuPDF
+            except ImportError:
+                raise ValueError("PDF uploads require PyMuPDF (pip install PyMuPDF)")
+
+            with fitz.open(path) as pdf:
+                if pdf.needs_pass:
+                    if not password:
+                        raise PDFPasswordError("The PDF is password protected; send its password in the 'password' field")
+                    if not pdf.authenticate(password):
+                        raise PDFPasswordError("Incorrect password for the PDF")
+                for page_number in range(pdf.page_count):
+                    if emitted >= max_pages:
+                        return
+                    pixmap = pdf.load_page(page_number).get_pixmap(dpi=dpi)
+                    yield pixmap.tobytes("png")
+                    emitted += 1
+
+    @staticmethod
+    def map_pages(pages: Iterator[bytes], fn: Callable, parallelism: int = settings.INGEST_PAGE_PARALLELISM) -> List:
+        """
+        Applies fn to every page in parallel and returns the results in page order.
+        At most `parallelism` pages are pulled from the iterator ahead of the
+        results, so memory stays bounded no matter how long the document is.
+        """
+        results = []
+        with ThreadPoolExecutor(max_workers=max(parallelism, 1), thread_name_prefix="page") as executor:
+            in_flight = deque()
+            for page in pages:
+                # Run in a copy of the caller's context so logs keep the request ID
+                in_flight.append(executor.submit(contextvars.copy_context().run, fn, page))
+                if len(in_flight) >= parallelism:
+                    results.append(in_flight.popleft().result())
+            while in_flight:
+                results.append(in_flight.popleft().result())
+        return results
+
+    @staticmethod
+    def build_ocr_document(page_images: List[bytes]) -> bytes:
+        """
+        Packs rectified page images into a single payload for one OCR request:
+        the image itself for one page, a multi-page PDF otherwise.
+        """
+        if len(page_images) == 1:
+            return page_images[0]
+
+        images = [Image.open(io.BytesIO(data)).convert("RGB") for data in page_images]
+        output = io.BytesIO()
+        images[0].save(output, format="PDF", save_all=True, append_images=images[1:], resolution=settings.INGEST_PDF_DPI)
+        return output.getvalue()
@@ -46,7 +46,7 @@ class Deskew:
                 
             return angle
         except Exception as e:
-            app_logger.error(f"Error calculating skew angle: {e}")
+            app_logger.error("Error calculating skew angle: {}", e)
             return 0.0
 
     @staticmethod
@@ -61,7 +61,7 @@ class Deskew:
             rotated = cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
             return rotated
         except Exception as e:
-            app_logger.error(f"Error rotating image: {e}")
+            app_logger.error("Error rotating image: {}", e)
             return image
 
     @staticmethod
@@ -70,7 +70,7 @@ class Deskew:
         Main method to deskew an image.
         """
         angle = Deskew.get_skew_angle(image)
-        app_logger.info(f"Detected skew angle: {angle}")
+        app_logger.info("Detected skew angle: {}", angle)
         
         if abs(angle) > 0.5: # Only rotate if skew is significant
             return Deskew.rotate_image(image, angle)
@@ -22,7 +22,7 @@ class QualityMetrics:
             score = cv2.Laplacian(gray, cv2.CV_64F).var()
             return score
         except Exception as e:
-            app_logger.error(f"Error calculating blur score: {e}")
+            app_logger.error("Error calculating blur score: {}", e)
             return 0.0
 
     @staticmethod
@@ -39,7 +39,7 @@ class QualityMetrics:
                 brightness = np.mean(image)
             return brightness
         except Exception as e:
-            app_logger.error(f"Error calculating lighting score: {e}")
+            app_logger.error("Error calculating lighting score: {}", e)
             return 0.0
 
     @staticmethod
@@ -0,0 +1,230 @@
+import cv2
+import numpy as np
+from preprocessing.deskew import Deskew
+from utils.logger import app_logger
+
+
+class CardRectifier:
+    """
+    Finds the card's four corners and maps it onto a fixed-size canonical canvas
+    with a single perspective warp (rotation, perspective and crop together).
+    """
+
+    # ID-1 card aspect ratio (85.6 x 54 mm)
+    CANVAS_WIDTH = 1000
+    CANVAS_HEIGHT = 630
+
+    # Corner detection runs on a downscaled copy of this longest side
+    DETECT_SIZE = 512
+
+    # The card must cover at least this fraction of the frame
+    MIN_AREA_RATIO = 0.2
+
+    # A candidate quad must cover this much of its contour's hull (and vice versa)
+    MIN_FILL_RATIO = 0.85
+
+    # Smallest interior angle (degrees) accepted for a perspective-distorted card
+    MIN_CORNER_ANGLE = 50
+
+    # The long edge must beat the short one by this much before treating the card as sideways
+    SIDEWAYS_RATIO = 1.15
+
+    NOT_FOUND_REPORT = {"card_found": False, "rotation": 0, "orientation_verified": False}
+
+    _face_cascade = None
+
+    @staticmethod
+    def find_card_quad(image: np.ndarray) -> np.ndarray:
+        """
+        Returns the card corners in full-resolution coordinates, or None.
+        """
+        try:
+            h, w = image.shape[:2]
+            scale = min(1.0, CardRectifier.DETECT_SIZE / max(h, w))
+            small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if len(small.shape) == 3 else small
+
+            blur = cv2.GaussianBlur(gray, (5, 5), 0)
+            edges = cv2.Canny(blur, 50, 150)
+            edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8), iterations=2)
+
+            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            min_area = CardRectifier.MIN_AREA_RATIO * small.shape[0] * small.shape[1]
+
+            # Edge contours are rarely closed, so compare their convex hulls
+            hulls = sorted((cv2.convexHull(c) for c in contours), key=cv2.contourArea, reverse=True)
+
+            for hull in hulls[:5]:
+                hull_area = cv2.contourArea(hull)
+                if hull_area < min_area:
+                    break
+
+                approx = cv2.approxPolyDP(hull, 0.02 * cv2.arcLength(hull, True), True)
+                if len(approx) == 4 and CardRectifier._is_card_like(approx.reshape(4, 2), hull_area):
+                    return approx.reshape(4, 2).astype(np.float32) / scale
+
+                # Rounded corners or a partly occluded edge: fall back to the bounding rotated rect
+                box = cv2.boxPoints(cv2.minAreaRect(hull))
+                if hull_area >= CardRectifier.MIN_FILL_RATIO * cv2.contourArea(box):
+                    return box.astype(np.float32) / scale
+
+            return None
+        except Exception as e:
+            app_logger.error("Error finding card corners: {}", e)
+            return None
+
+    @staticmethod
+    def _is_card_like(quad: np.ndarray, hull_area: float) -> bool:
+        """
+        Rejects quads that cut through the card or are too distorted to be one.
+        """
+        quad = quad.astype(np.float32)
+        if not cv2.isContourConvex(quad):
+            return False
+        if cv2.contourArea(quad) < CardRectifier.MIN_FILL_RATIO * hull_area:
+            return False
+
+        for i in range(4):
+            a = quad[i - 1] - quad[i]
+            b = quad[(i + 1) % 4] - quad[i]
+            cos = np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-6)
+            if np.degrees(np.arccos(np.clip(cos, -1.0, 1.0))) < CardRectifier.MIN_CORNER_ANGLE:
+                return False
+        return True
+
+    @staticmethod
+    def order_corners(quad: np.ndarray) -> tuple:
+        """
+        Orders corners as top-left, top-right, bottom-right, bottom-left,
+        with the long edge of the card along the top.
+        Returns (corners, rotation in degrees applied to get there).
+        """
+        # Sorting by angle around the centroid always yields four distinct
+        # corners in clockwise order (image y points down), even for a card
+        # turned 45° where x+y / y-x extremes tie.
+        quad = quad.astype(np.float32)
+        center = quad.mean(axis=0)
+        clockwise = quad[np.argsort(np.arctan2(quad[:, 1] - center[1], quad[:, 0] - center[0]))]
+        ordered = np.roll(clockwise, -int(np.argmin(clockwise.sum(axis=1))), axis=0)
+
+        top = np.linalg.norm(ordered[1] - ordered[0])
+        left = np.linalg.norm(ordered[3] - ordered[0])
+        if left > CardRectifier.SIDEWAYS_RATIO * top:
+            # Card is lying on its side: rotate the corner order by 90°
+            return np.roll(ordered, -1, axis=0), 90
+        return ordered, 0
+
+    @staticmethod
+    def face_orientation(canvas: np.ndarray):
+        """
+        Uses the holder's photo as an orientation cue: an upright frontal face
+        is only detected when the card is the right way up. Returns 0 (upright),
+        180 (upside down) or None when no face settles it, e.g. on the back of
+        the card, which has no photo.
+        """
+        if not hasattr(cv2, "CascadeClassifier"):
+            # Some OpenCV builds ship without objdetect
+            return None
+
+        if CardRectifier._face_cascade is None:
+            CardRectifier._face_cascade = cv2.CascadeClassifier(
+                cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+            )
+
+        gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY) if len(canvas.shape) == 3 else canvas
+        small = cv2.resize(gray, (CardRectifier.CANVAS_WIDTH // 2, CardRectifier.CANVAS_HEIGHT // 2),
+                           interpolation=cv2.INTER_AREA)
+
+        def has_face(img):
+            return len(CardRectifier._face_cascade.detectMultiScale(img, 1.1, 5, minSize=(30, 30))) > 0
+
+        if has_face(small):
+            return 0
+        if has_face(cv2.rotate(small, cv2.ROTATE_180)):
+            return 180
+        return None
+
+    @staticmethod
+    def rectify(image: np.ndarray) -> tuple:
+        """
+        Main method: returns (canonical card image, rectification report, transform).
+        The transform maps original pixels onto the canvas and is None when no
+        card is found, in which case the full frame is deskewed in-plane instead.
+        The report's `orientation_verified` is False when no face was found to
+        tell 0° from 180° (90° from 270°), so the canvas may be upside down.
+        """
+        quad = CardRectifier.find_card_quad(image)
+        if quad is None:
+            app_logger.info("Card corners not found, falling back to deskew")
+            return CardRectifier.fallback(image), CardRectifier.NOT_FOUND_REPORT.copy(), None
+
+        try:
+            corners, rotation = CardRectifier.order_corners(quad)
+            target = np.array([
+                [0, 0],
+                [CardRectifier.CANVAS_WIDTH - 1, 0],
+                [CardRectifier.CANVAS_WIDTH - 1, CardRectifier.CANVAS_HEIGHT - 1],
+                [0, CardRectifier.CANVAS_HEIGHT - 1],
+            ], dtype=np.float32)
+
+            M = cv2.getPerspectiveTransform(corners, target)
+            canvas = cv2.warpPerspective(
+                image, M, (CardRectifier.CANVAS_WIDTH, CardRectifier.CANVAS_HEIGHT),
+                flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE
+            )
+
+            orientation = CardRectifier.face_orientation(canvas)
+            if orientation == 180:
+                canvas = cv2.rotate(canvas, cv2.ROTATE_180)
+                rotation = (rotation + 180) % 360
+                flip = np.array([
+                    [-1, 0, CardRectifier.CANVAS_WIDTH - 1],
+                    [0, -1, CardRectifier.CANVAS_HEIGHT - 1],
+                    [0, 0, 1],
+                ], dtype=np.float64)
+                M = flip @ M
+
+            return canvas, {"card_found": True, "rotation": rotation,
+                            "orientation_verified": orientation is not None}, M
+        except Exception as e:
+            app_logger.error("Error rectifying card: {}", e)
+            return CardRectifier.fallback(image), CardRectifier.NOT_FOUND_REPORT.copy(), None
+
+    @staticmethod
+    def fallback(image: np.ndarray) -> np.ndarray:
+        """
+        Deskews the whole frame when no card was found, downscaled so its
+        longest side is at most CANVAS_WIDTH. Output size stays bounded like
+        the rectified canvas (it must fit a CV pool slot), and deskewing the
+        smaller image is cheaper too.
+        """
+        h, w = image.shape[:2]
+        scale = CardRectifier.CANVAS_WIDTH / max(h, w)
+        if scale < 1:
+            image = cv2.resize(image, (max(int(w * scale), 1), max(int(h * scale), 1)), interpolation=cv2.INTER_AREA)
+        return Deskew.deskew_image(image)
+
+    @staticmethod
+    def warp_region(image: np.ndarray, transform: np.ndarray, bbox: list, margin: float = 0.1) -> np.ndarray:
+        """
+        Re-warps one canvas region (x1, y1, x2, y2) from the original image at
+        the original resolution, e.g. to decode a dense QR code that the
+        downscaled canvas cannot resolve.
+        """
+        x1, y1, x2, y2 = bbox
+        pad_x, pad_y = (x2 - x1) * margin, (y2 - y1) * margin
+        x1, y1, x2, y2 = x1 - pad_x, y1 - pad_y, x2 + pad_x, y2 + pad_y
+
+        # How many original pixels one canvas pixel covers around this region
+        corners = np.array([[[x1, y1], [x2, y1], [x2, y2], [x1, y2]]], dtype=np.float64)
+        original = cv2.perspectiveTransform(corners, np.linalg.inv(transform))[0]
+        scale = max(1.0, np.linalg.norm(original[1] - original[0]) / (x2 - x1))
+
+        crop = np.array([
+            [scale, 0, -scale * x1],
+            [0, scale, -scale * y1],
+            [0, 0, 1],
+        ], dtype=np.float64)
+        size = (int(np.ceil((x2 - x1) * scale)), int(np.ceil((y2 - y1) * scale)))
+        return cv2.warpPerspective(image, crop @ transform, size, flags=cv2.INTER_LINEAR,
+                                   borderMode=cv2.BORDER_REPLICATE)
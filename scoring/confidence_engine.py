@@ -6,19 +6,18 @@ class ConfidenceEngine:
     @staticmethod
     def calculate_ocr_confidence(ocr_data: dict) -> float:
         """
-        Average confidence of extracted fields.
+        Average confidence of extracted fields, across all pages.
         """
         if not ocr_data or "documents" not in ocr_data:
             return 0.0
             
         try:
-            doc = ocr_data["documents"][0]
-            fields = doc.get("fields", {})
+            fields = [f for doc in ocr_data["documents"] for f in doc.get("fields", {}).values()]
             
             if not fields:
                 return 0.0
                 
-            total_conf = sum(f["confidence"] for f in fields.values())
+            total_conf = sum(f["confidence"] for f in fields)
             avg_conf = total_conf / len(fields)
             
             return avg_conf
@@ -1,46 +1,77 @@
+import numpy as np
+from scoring.policy import DecisionPolicy, active_policy
+
+
 class DecisionEngine:
     """
     Combines scores to make a final decision.
     """
-    
+
+    DECISIONS = ("SAFE", "REVIEW", "FRAUD")
+
     @staticmethod
-    def calculate_risk_score(ocr_conf: float, yolo_fraud_score: float, anomaly_score: float) -> float:
+    def calculate_risk_score(ocr_conf: float, yolo_fraud_score: float, anomaly_score: float,
+                             policy: DecisionPolicy = None) -> float:
         """
         Final Risk Score = (OCR Confidence * 0.4) + (YOLO Fraud Score * 0.4) + (Anomaly Score * 0.2)
-        
+
         Wait, the formula in requirements is a bit ambiguous.
         "OCR Confidence" is usually "Goodness", while "Fraud Score" is "Badness".
-        
+
         Let's invert OCR Confidence to "OCR Uncertainty" for a Risk Score.
         Risk = ((1 - OCR_Conf) * 0.4) + (YOLO_Fraud * 0.4) + (Anomaly * 0.2)
-        
+
         Let's stick to the user's prompt but interpret it logically.
         If the user meant "Risk Score", then high OCR confidence should LOWER the risk.
-        
+
         Let's assume the user wants a score from 0-100 where 100 is FRAUD.
-        
+
         Risk = ( (1.0 - OCR_Conf) * 40 ) + ( YOLO_Fraud * 40 ) + ( Anomaly * 20 )
-        
-        This sums up to 100 max.
+
+        This sums up to 100 max. The weights come from the active DecisionPolicy.
         """
-        
-        term1 = (1.0 - ocr_conf) * 40
-        term2 = yolo_fraud_score * 40
-        term3 = anomaly_score * 20
-        
+        policy = policy or active_policy
+
+        term1 = (1.0 - ocr_conf) * policy.ocr_weight
+        term2 = yolo_fraud_score * policy.fraud_weight
+        term3 = anomaly_score * policy.anomaly_weight
+
         final_score = term1 + term2 + term3
         return round(final_score, 2)
 
     @staticmethod
-    def make_decision(risk_score: float) -> str:
+    def make_decision(risk_score: float, policy: DecisionPolicy = None) -> str:
         """
         0–40 → SAFE
         41–70 → REVIEW
         71–100 → FRAUD
+        (thresholds from the active DecisionPolicy)
         """
-        if risk_score <= 40:
+        policy = policy or active_policy
+        if risk_score <= policy.safe_threshold:
             return "SAFE"
-        elif risk_score <= 70:
+        elif risk_score <= policy.review_threshold:
             return "REVIEW"
         else:
             return "FRAUD"
+
+    @staticmethod
+    def score_many(ocr_conf: np.ndarray, fraud_score: np.ndarray, anomaly_score: np.ndarray,
+                   policy: DecisionPolicy = None) -> tuple:
+        """
+        Vectorized calculate_risk_score + make_decision over whole columns.
+        Returns (risk_scores, decision_codes) where codes index DecisionEngine.DECISIONS.
+        """
+        policy = policy or active_policy
+        ocr_conf = np.asarray(ocr_conf, dtype=np.float64)
+        fraud_score = np.asarray(fraud_score, dtype=np.float64)
+        anomaly_score = np.asarray(anomaly_score, dtype=np.float64)
+
+        risk = (1.0 - ocr_conf) * policy.ocr_weight
+        risk += fraud_score * policy.fraud_weight
+        risk += anomaly_score * policy.anomaly_weight
+        risk = np.round(risk, 2)
+
+        codes = (risk > policy.safe_threshold).astype(np.uint8)
+        codes += risk > policy.review_threshold
+        return risk, codes
@@ -0,0 +1,30 @@
+import json
+from pydantic import BaseModel
+from utils.config import settings
+
+
+class DecisionPolicy(BaseModel):
+    """
+    Weights and thresholds used to turn stage scores into a decision.
+
+    risk = (1 - ocr_conf) * ocr_weight + fraud * fraud_weight + anomaly * anomaly_weight
+    risk <= safe_threshold -> SAFE, risk <= review_threshold -> REVIEW, else FRAUD
+    """
+    ocr_weight: float = 40.0
+    fraud_weight: float = 40.0
+    anomaly_weight: float = 20.0
+    safe_threshold: float = 40.0
+    review_threshold: float = 70.0
+
+    @classmethod
+    def load(cls, path: str = "") -> "DecisionPolicy":
+        """
+        Loads a policy from a JSON file. An empty path gives the default policy.
+        """
+        if not path:
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+active_policy = DecisionPolicy.load(settings.DECISION_POLICY_PATH)
@@ -0,0 +1,127 @@
+import fcntl
+import os
+import threading
+import time
+from typing import Dict, List
+import numpy as np
+from utils.config import settings
+from utils.logger import app_logger
+
+
+class StageStore:
+    """
+    Append-only columnar store of per-request stage outputs.
+
+    The store is a directory with one file per column, each a header followed
+    by the column's values as a plain little-endian array. A request appends
+    one value to every column file while holding an flock on the directory's
+    lock file, so several API workers can share one store. Reading maps each
+    column file with np.memmap, giving one contiguous, aligned array per
+    column without parsing or copying.
+    """
+
+    MAGIC = b"AADHCOL1".ljust(16, b"\0")
+    HEADER_SIZE = len(MAGIC)
+    LOCK_FILE = ".lock"
+
+    COLUMNS = {
+        "timestamp": "<f8",
+        "ocr_confidence": "<f4",
+        "yolo_fraud_score": "<f4",
+        "forgery_score": "<f4",
+        "fraud_score": "<f4",
+        "anomaly_score": "<f4",
+        "blur_score": "<f4",
+        "lighting_score": "<f4",
+        "quality_pass": "u1",
+        "validation_score": "<f4",
+        "risk_score": "<f4",
+        "decision": "u1",
+        "degraded": "<u2",
+    }
+
+    # Bit i of the "degraded" column is set when DEGRADED_STAGES[i] was skipped
+    # for the deadline, i.e. its score is a placeholder rather than a measurement.
+    # Append only, so stored masks keep their meaning.
+    DEGRADED_STAGES = ["denoise", "anomaly", "llm"]
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fds = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def degraded_mask(cls, stages: List[str]) -> int:
+        mask = 0
+        for stage in stages:
+            if stage in cls.DEGRADED_STAGES:
+                mask |= 1 << cls.DEGRADED_STAGES.index(stage)
+        return mask
+
+    def _column_path(self, column: str) -> str:
+        return os.path.join(self.path, f"{column}.col")
+
+    def _open(self) -> dict:
+        if self._fds is None:
+            os.makedirs(self.path, exist_ok=True)
+            fds = {self.LOCK_FILE: os.open(os.path.join(self.path, self.LOCK_FILE), os.O_WRONLY | os.O_CREAT, 0o644)}
+            for column in self.COLUMNS:
+                try:
+                    fd = os.open(self._column_path(column), os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+                    os.write(fd, self.MAGIC)
+                except FileExistsError:
+                    fd = os.open(self._column_path(column), os.O_WRONLY | os.O_APPEND)
+                fds[column] = fd
+            self._fds = fds
+        return self._fds
+
+    def append(self, outputs: dict):
+        """
+        Appends one request's stage outputs. Missing columns are stored as zero;
+        `degraded` may be given as a list of stage names.
+        Failures are logged and never propagate to the request.
+        """
+        try:
+            values = dict(outputs, timestamp=time.time())
+            if isinstance(values.get("degraded"), (list, tuple)):
+                values["degraded"] = self.degraded_mask(values["degraded"])
+
+            with self._lock:
+                fds = self._open()
+                fcntl.flock(fds[self.LOCK_FILE], fcntl.LOCK_EX)
+                try:
+                    for column, dtype in self.COLUMNS.items():
+                        value = values.get(column)
+                        os.write(fds[column], np.array(0 if value is None else value, dtype=dtype).tobytes())
+                finally:
+                    fcntl.flock(fds[self.LOCK_FILE], fcntl.LOCK_UN)
+        except Exception as e:
+            app_logger.error("Error writing stage outputs: {}", e)
+
+    @classmethod
+    def load(cls, path: str) -> Dict[str, np.ndarray]:
+        """
+        Memory-maps every column of a store (read-only) as {column: array}.
+        All columns have the same length.
+        """
+        sizes = {}
+        for column, dtype in cls.COLUMNS.items():
+            column_path = os.path.join(path, f"{column}.col")
+            with open(column_path, "rb") as f:
+                if f.read(cls.HEADER_SIZE) != cls.MAGIC:
+                    raise ValueError(f"{column_path} is not a stage store column")
+            sizes[column] = (os.path.getsize(column_path) - cls.HEADER_SIZE) // np.dtype(dtype).itemsize
+
+        # Ignore the tail of a writer that is mid-append (or died there).
+        count = min(sizes.values())
+        columns = {}
+        for column, dtype in cls.COLUMNS.items():
+            if count == 0:
+                columns[column] = np.zeros(0, dtype=dtype)
+            else:
+                columns[column] = np.memmap(os.path.join(path, f"{column}.col"), dtype=dtype, mode="r",
+                                            offset=cls.HEADER_SIZE, shape=(count,))
+        return columns
+
+
+stage_store = StageStore(settings.STAGE_STORE_PATH)
@@ -0,0 +1,4 @@
+import os
+
+# Keep test runs out of the service's log file
+os.environ["LOG_FILE_PATH"] = ""
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from api.admission import AdmissionController, AdmissionRejected
+
+
+def _controller(**kwargs) -> AdmissionController:
+    options = dict(initial_limit=1, min_limit=1, max_limit=8, max_queue={"interactive": 2, "batch": 2},
+                   max_wait=1.0, latency_tolerance=2.0, min_latency_window=10, backoff_ratio=0.5)
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def test_interactive_requests_are_admitted_before_batch():
+    async def scenario():
+        controller = _controller()
+        await controller.acquire("interactive")
+        order = []
+
+        async def wait(priority):
+            await controller.acquire(priority)
+            order.append(priority)
+            controller.release()
+
+        batch = asyncio.ensure_future(wait("batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(wait("interactive"))
+        await asyncio.sleep(0)
+
+        controller.release()
+        await asyncio.gather(batch, interactive)
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "batch"]
+
+
+def test_full_queue_is_shed_with_retry_after():
+    async def scenario():
+        controller = _controller(max_queue={"interactive": 1, "batch": 1})
+        await controller.acquire("batch")
+        waiter = asyncio.ensure_future(controller.acquire("batch"))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire("batch")
+            assert rejected.value.retry_after >= 1
+        finally:
+            waiter.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_wait_is_bounded_by_the_request_timeout():
+    async def scenario():
+        controller = _controller()
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(timeout=0.05)
+        # The timed-out waiter gave up its place in the queue
+        controller.release()
+        assert await controller.acquire() == 0.0
+
+    asyncio.run(scenario())
+
+
+def test_limit_shrinks_when_stage_latency_exceeds_its_minimum():
+    controller = _controller(initial_limit=4)
+    for _ in range(5):
+        controller._in_flight = 1
+        controller.release(latency=5.0, stage_latency=0.1)
+    assert controller.limit == 4
+
+    controller._in_flight = 1
+    controller.release(latency=5.0, stage_latency=1.0)
+    assert controller.limit == 2
+
+
+def test_slow_end_to_end_latency_alone_does_not_shrink_the_limit():
+    controller = _controller(initial_limit=4)
+    for latency in (1.0, 10.0, 30.0):
+        controller._in_flight = 1
+        controller.release(latency=latency, stage_latency=0.1)
+    assert controller.limit == 4
+
+
+def test_failed_requests_do_not_change_the_limit():
+    controller = _controller(initial_limit=4)
+    for _ in range(20):
+        controller._in_flight = 4
+        controller.release()
+    assert controller.limit == 4
+
+
+def test_limit_grows_while_saturated_at_stable_latency():
+    controller = _controller(initial_limit=2)
+    for _ in range(20):
+        controller._in_flight = controller.limit
+        controller.release(latency=1.0, stage_latency=0.1)
+    assert controller.limit > 2
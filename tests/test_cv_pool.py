@@ -0,0 +1,144 @@
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+import cv2
+import numpy as np
+import pytest
+from pipeline import cv_pool
+from pipeline.cv_pool import SharedMemoryCVPool
+
+# The first pixel of a task's image tells FakeRunner what to do
+SLOW = 0
+FAIL = 255
+TASK_SECONDS = 1.0
+
+
+class FakeRunner:
+    """
+    Stands in for CVStageRunner in the pool processes: sleeps and echoes the
+    image, or fails, and reports the PID of the worker that ran the task.
+    """
+
+    def run(self, image, deadline):
+        if image[0, 0, 0] == FAIL:
+            raise ValueError("simulated stage failure")
+        time.sleep(TASK_SECONDS)
+        return image, {"pid": os.getpid()}
+
+
+def _image(value: int) -> bytes:
+    return cv2.imencode(".png", np.full((8, 8, 3), value, dtype=np.uint8))[1].tobytes()
+
+
+def _run(pool: SharedMemoryCVPool, value: int, timeout: float = 30.0) -> dict:
+    with pool.process(_image(value), timeout=timeout) as (_, report):
+        return report
+
+
+def _concurrently(*calls) -> list:
+    """
+    Runs the calls in parallel threads; returns each result or exception.
+    """
+    results = [None] * len(calls)
+
+    def run(index, call):
+        try:
+            results[index] = call()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _wait_for_free_slots(pool: SharedMemoryCVPool, expected: int, timeout: float = 10.0) -> int:
+    deadline = time.monotonic() + timeout
+    while pool.free_slots() != expected and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return pool.free_slots()
+
+
+@pytest.fixture
+def pool():
+    pool = SharedMemoryCVPool(workers=2, slots_per_worker=2, slot_bytes=1024 * 1024, pin_cpus=False,
+                              runner_factory=FakeRunner)
+    pool.start()
+    # One failing task per worker waits for both processes to boot
+    _concurrently(lambda: _run(pool, FAIL, timeout=60), lambda: _run(pool, FAIL, timeout=60))
+    assert _wait_for_free_slots(pool, 4) == 4
+    yield pool
+    pool.close()
+
+
+def test_concurrent_tasks_run_on_different_workers(pool):
+    started = time.monotonic()
+    reports = _concurrently(lambda: _run(pool, SLOW), lambda: _run(pool, SLOW))
+    elapsed = time.monotonic() - started
+
+    assert reports[0]["pid"] != reports[1]["pid"]
+    assert elapsed < 1.8 * TASK_SECONDS
+    assert pool.free_slots() == 4
+
+
+def test_worker_error_releases_slot(pool):
+    with pytest.raises(RuntimeError, match="simulated stage failure"):
+        _run(pool, FAIL)
+    assert pool.free_slots() == 4
+
+
+def test_timeout_keeps_slot_until_worker_finishes(pool):
+    with pytest.raises(TimeoutError):
+        _run(pool, SLOW, timeout=0.2)
+    # The worker is still writing into the slot, so it must not be reused yet
+    assert pool.free_slots() == 3
+    assert _wait_for_free_slots(pool, 4) == 4
+
+
+def test_error_settled_while_timing_out_releases_slot(pool, monkeypatch):
+    class RacingFuture(Future):
+        """
+        Times out only after the collector has already settled the task.
+        """
+
+        def result(self, timeout=None):
+            if timeout is None:
+                return super().result()
+            self.exception()
+            raise TimeoutError()
+
+    monkeypatch.setattr(cv_pool, "Future", RacingFuture)
+    with pytest.raises(RuntimeError, match="simulated stage failure"):
+        _run(pool, FAIL, timeout=5)
+    assert pool.free_slots() == 4
+
+
+def test_dead_worker_fails_its_task_and_is_replaced(pool):
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(_concurrently(lambda: _run(pool, SLOW))))
+    thread.start()
+
+    deadline = time.monotonic() + 5
+    while not pool._tasks and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker = next(iter(pool._tasks.values())).worker
+    dead = pool._processes[worker]
+    os.kill(dead.pid, signal.SIGKILL)
+    thread.join(timeout=10)
+
+    assert isinstance(results[0], RuntimeError)
+    assert "died" in str(results[0])
+    assert _wait_for_free_slots(pool, 4) == 4
+
+    # The task fails just before the replacement is started
+    deadline = time.monotonic() + 5
+    while pool._processes[worker] is dead and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool._processes[worker] is not dead
+    assert pool._processes[worker].is_alive()
+    assert _run(pool, SLOW)["pid"] != dead.pid
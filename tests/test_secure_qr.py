@@ -0,0 +1,89 @@
+import datetime
+import gzip
+import os
+import sys
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+from ocr.secure_qr import SecureQRDecoder
+from utils.config import settings
+
+FIELDS = {
+    "email_mobile_indicator": "3", "reference_id": "123420190101120000000", "name": "Test User",
+    "dob": "01-01-1990", "gender": "M", "care_of": "", "district": "Bengaluru", "landmark": "",
+    "house": "1", "location": "", "pincode": "560001", "post_office": "", "state": "Karnataka",
+    "street": "Test Street", "sub_district": "", "vtc": "",
+}
+
+
+@pytest.fixture(scope="module")
+def signing_key(tmp_path_factory):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key()) \
+        .serial_number(1).not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1)) \
+        .sign(key, hashes.SHA256())
+    path = tmp_path_factory.mktemp("cert") / "uidai.cer"
+    path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    return key, str(path)
+
+
+@pytest.fixture(autouse=True)
+def certificate(signing_key, monkeypatch):
+    monkeypatch.setattr(settings, "UIDAI_CERT_PATH", signing_key[1])
+    monkeypatch.setattr(SecureQRDecoder, "_public_key", None)
+
+
+def _payload(key, photo: bytes = b"\xff\xd8photo\xff\xd9", tamper: bool = False) -> str:
+    signed = b"V2\xff" + b"\xff".join(v.encode("iso-8859-1") for v in FIELDS.values()) + b"\xff" + photo
+    signature = key.sign(signed, padding.PKCS1v15(), hashes.SHA256())
+    if tamper:
+        signed = signed.replace(b"Test User", b"Evil User")
+    return _digits(gzip.compress(signed + signature))
+
+
+def _digits(data: bytes) -> str:
+    # Encoding is not under test: lift the 4300-digit limit parse() has to live with
+    limit = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    try:
+        return str(int.from_bytes(data, "big"))
+    finally:
+        sys.set_int_max_str_digits(limit)
+
+
+def test_signed_payload_is_parsed_and_verified(signing_key):
+    result = SecureQRDecoder.parse(_payload(signing_key[0]))
+
+    assert result["signature_valid"] is True
+    assert result["name"] == "Test User"
+    assert result["aadhaar_number"] == "XXXX XXXX 1234"
+    assert result["address"] == "1, Test Street, Bengaluru, Karnataka, 560001"
+
+
+def test_tampered_payload_fails_verification(signing_key):
+    result = SecureQRDecoder.parse(_payload(signing_key[0], tamper=True))
+
+    assert result["name"] == "Evil User"
+    assert result["signature_valid"] is False
+
+
+def test_payload_above_python_int_digit_limit_is_parsed(signing_key):
+    # An incompressible photo makes the payload longer than 4300 digits
+    payload = _payload(signing_key[0], photo=os.urandom(2000))
+    assert 4300 < len(payload) <= SecureQRDecoder.MAX_PAYLOAD_DIGITS
+
+    assert SecureQRDecoder.parse(payload)["signature_valid"] is True
+
+
+@pytest.mark.parametrize("payload", [
+    "<?xml version='1.0'?><PrintLetterBarcodeData/>",
+    "9" * (SecureQRDecoder.MAX_PAYLOAD_DIGITS + 1),
+    "123456789",
+    _digits(gzip.compress(b"\0" * (SecureQRDecoder.MAX_DECOMPRESSED_BYTES * 4))),
+], ids=["not_numeric", "too_many_digits", "not_gzip", "decompression_bomb"])
+def test_invalid_payloads_are_rejected(payload):
+    assert SecureQRDecoder.parse(payload) is None
@@ -0,0 +1,72 @@
+import threading
+import numpy as np
+import pytest
+from scoring.stage_store import StageStore
+
+
+def test_columns_load_as_contiguous_aligned_arrays(tmp_path):
+    store = StageStore(str(tmp_path / "store"))
+    for i in range(3):
+        store.append({"ocr_confidence": 0.5 + i / 10, "decision": i})
+
+    records = StageStore.load(str(tmp_path / "store"))
+
+    assert set(records) == set(StageStore.COLUMNS)
+    confidence = records["ocr_confidence"]
+    assert confidence.flags["C_CONTIGUOUS"] and confidence.flags["ALIGNED"]
+    np.testing.assert_allclose(confidence, [0.5, 0.6, 0.7], rtol=1e-6)
+    assert records["decision"].tolist() == [0, 1, 2]
+    # Missing columns are stored as zero
+    assert records["anomaly_score"].tolist() == [0.0, 0.0, 0.0]
+
+
+def test_degraded_stages_are_stored_as_a_bitmask(tmp_path):
+    store = StageStore(str(tmp_path))
+    store.append({"anomaly_score": 0.0, "degraded": ["anomaly", "llm"]})
+    store.append({"anomaly_score": 0.3, "degraded": []})
+
+    degraded = StageStore.load(str(tmp_path))["degraded"]
+
+    assert degraded[0] == StageStore.degraded_mask(["anomaly"]) | StageStore.degraded_mask(["llm"])
+    assert degraded[1] == 0
+
+
+def test_partial_append_is_ignored(tmp_path):
+    store = StageStore(str(tmp_path))
+    store.append({"risk_score": 10.0})
+    store.append({"risk_score": 20.0})
+    # A writer that died halfway through its row
+    with open(tmp_path / "risk_score.col", "ab") as f:
+        f.write(np.float32(30.0).tobytes())
+
+    records = StageStore.load(str(tmp_path))
+
+    assert {len(values) for values in records.values()} == {2}
+    assert records["risk_score"].tolist() == [10.0, 20.0]
+
+
+def test_concurrent_writers_keep_rows_aligned(tmp_path):
+    stores = [StageStore(str(tmp_path)) for _ in range(4)]
+
+    def write(store, offset):
+        for i in range(200):
+            value = offset + i
+            store.append({"risk_score": value, "validation_score": value})
+
+    threads = [threading.Thread(target=write, args=(store, n * 1000)) for n, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    records = StageStore.load(str(tmp_path))
+    assert len(records["risk_score"]) == 800
+    assert np.array_equal(records["risk_score"], records["validation_score"])
+
+
+def test_rejects_foreign_files(tmp_path):
+    StageStore(str(tmp_path)).append({})
+    (tmp_path / "decision.col").write_bytes(b"not a column")
+
+    with pytest.raises(ValueError):
+        StageStore.load(str(tmp_path))
@@ -11,6 +11,10 @@ class Settings(BaseSettings):
     APP_NAME: str = "Aadhaar Verification AI"
     API_V1_STR: str = "/api/v1"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FILE_PATH: str = os.getenv("LOG_FILE_PATH", "logs/app.log")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")  # e.g. "INFO=0.1,DEBUG=0.01"
+    LOG_JSON_CONSOLE: bool = os.getenv("LOG_JSON_CONSOLE", "false").lower() == "true"
     
     # Azure Document Intelligence (Form Recognizer)
     AZURE_FORM_RECOGNIZER_ENDPOINT: str = os.getenv("AZURE_FORM_RECOGNIZER_ENDPOINT", "")
@@ -22,8 +26,49 @@ class Settings(BaseSettings):
     AZURE_OPENAI_DEPLOYMENT_NAME: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "")
     AZURE_OPENAI_API_VERSION: str = os.getenv("AZURE_OPENAI_API_VERSION", "2023-12-01-preview")
     
+    # Offline secure QR (signing certificate published by UIDAI)
+    SECURE_QR_ENABLED: bool = os.getenv("SECURE_QR_ENABLED", "true").lower() == "true"
+    UIDAI_CERT_PATH: str = os.getenv("UIDAI_CERT_PATH", "certs/uidai_offline_publickey.cer")
+
     # Models
     YOLO_MODEL_PATH: str = os.getenv("YOLO_MODEL_PATH", "models/yolov8_aadhaar.pt")
+
+    # CV worker pool (0 workers = run CV stages in the request thread)
+    CV_POOL_WORKERS: int = int(os.getenv("CV_POOL_WORKERS", str(os.cpu_count() or 1)))
+    CV_POOL_SLOTS_PER_WORKER: int = int(os.getenv("CV_POOL_SLOTS_PER_WORKER", "2"))
+    CV_POOL_SLOT_MB: int = int(os.getenv("CV_POOL_SLOT_MB", "16"))
+    CV_POOL_PIN_CPUS: bool = os.getenv("CV_POOL_PIN_CPUS", "true").lower() == "true"
+    CV_POOL_TASK_TIMEOUT_SECONDS: float = float(os.getenv("CV_POOL_TASK_TIMEOUT_SECONDS", "30"))
+
+    # Document ingest
+    INGEST_PDF_DPI: int = int(os.getenv("INGEST_PDF_DPI", "200"))
+    INGEST_MAX_PAGES: int = int(os.getenv("INGEST_MAX_PAGES", "4"))
+    INGEST_PAGE_PARALLELISM: int = int(os.getenv("INGEST_PAGE_PARALLELISM", "2"))
+
+    # Scoring
+    DECISION_POLICY_PATH: str = os.getenv("DECISION_POLICY_PATH", "")  # JSON DecisionPolicy, empty = defaults
+    STAGE_STORE_PATH: str = os.getenv("STAGE_STORE_PATH", "stage_store/stage_outputs")  # directory, one file per column
+
+    # Admission control (per worker)
+    ADMISSION_INITIAL_LIMIT: int = int(os.getenv("ADMISSION_INITIAL_LIMIT", "4"))
+    ADMISSION_MIN_LIMIT: int = int(os.getenv("ADMISSION_MIN_LIMIT", "1"))
+    ADMISSION_MAX_LIMIT: int = int(os.getenv("ADMISSION_MAX_LIMIT", "16"))
+    ADMISSION_MAX_QUEUE_INTERACTIVE: int = int(os.getenv("ADMISSION_MAX_QUEUE_INTERACTIVE", "32"))
+    ADMISSION_MAX_QUEUE_BATCH: int = int(os.getenv("ADMISSION_MAX_QUEUE_BATCH", "8"))
+    ADMISSION_MAX_WAIT_SECONDS: float = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+    # Back off when local CV stage latency exceeds this multiple of its recent minimum
+    ADMISSION_LATENCY_TOLERANCE: float = float(os.getenv("ADMISSION_LATENCY_TOLERANCE", "2.0"))
+    ADMISSION_MIN_LATENCY_WINDOW: int = int(os.getenv("ADMISSION_MIN_LATENCY_WINDOW", "100"))
+    ADMISSION_BACKOFF_RATIO: float = float(os.getenv("ADMISSION_BACKOFF_RATIO", "0.8"))
+
+    # Request deadlines (X-Request-Timeout header overrides the default)
+    REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+    REQUEST_TIMEOUT_MAX_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", "120"))
+    DEADLINE_RESERVE_SECONDS: float = float(os.getenv("DEADLINE_RESERVE_SECONDS", "0.5"))
+    # Optional stages are skipped when less budget than this is left
+    DEADLINE_MIN_DENOISE_SECONDS: float = float(os.getenv("DEADLINE_MIN_DENOISE_SECONDS", "8"))
+    DEADLINE_MIN_ANOMALY_SECONDS: float = float(os.getenv("DEADLINE_MIN_ANOMALY_SECONDS", "6"))
+    DEADLINE_MIN_LLM_SECONDS: float = float(os.getenv("DEADLINE_MIN_LLM_SECONDS", "3"))
     
     class Config:
         case_sensitive = True
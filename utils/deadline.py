@@ -0,0 +1,82 @@
+import time
+from utils.config import settings
+from utils.metrics import metrics
+
+metrics.describe("deadline_exceeded_total", "counter", "Requests that ran out of time, by stage.")
+metrics.describe("pipeline_degraded_total", "counter", "Optional stages skipped to meet the request deadline.")
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a request runs out of time before a mandatory stage.
+    """
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded before stage '{stage}'")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    Absolute deadline of one request, passed down through every stage.
+
+    Based on time.monotonic(), which is system-wide on Linux, so a deadline
+    can be pickled into a CV pool worker and still refer to the same instant.
+    Optional stages call `allows()` before running and are recorded in
+    `degraded` when skipped; mandatory stages call `check()`.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.degraded = []
+
+    @staticmethod
+    def from_header(value: str = None) -> "Deadline":
+        """
+        Deadline from an X-Request-Timeout header (seconds), falling back to
+        REQUEST_TIMEOUT_SECONDS and capped at REQUEST_TIMEOUT_MAX_SECONDS.
+        """
+        try:
+            timeout = float(value) if value else settings.REQUEST_TIMEOUT_SECONDS
+        except ValueError:
+            timeout = settings.REQUEST_TIMEOUT_SECONDS
+        if timeout <= 0:
+            timeout = settings.REQUEST_TIMEOUT_SECONDS
+        return Deadline(min(timeout, settings.REQUEST_TIMEOUT_MAX_SECONDS))
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def budget(self, cap: float = None) -> float:
+        """
+        Time a stage may use: what is left after reserving
+        DEADLINE_RESERVE_SECONDS for scoring and the response, optionally capped.
+        """
+        budget = max(self.remaining() - settings.DEADLINE_RESERVE_SECONDS, 0.0)
+        return budget if cap is None else min(budget, cap)
+
+    def check(self, stage: str):
+        """
+        Raises DeadlineExceeded unless a mandatory stage has some budget left.
+        """
+        if self.budget() <= 0:
+            raise DeadlineExceeded(stage)
+
+    def allows(self, stage: str, min_seconds: float) -> bool:
+        """
+        True if an optional stage should run, i.e. at least min_seconds of
+        budget remain. Otherwise the stage is recorded as degraded.
+        """
+        if self.budget() >= min_seconds:
+            return True
+        self.skip(stage)
+        return False
+
+    def skip(self, stage: str):
+        if stage not in self.degraded:
+            self.degraded.append(stage)
+            metrics.inc("pipeline_degraded_total", stage=stage)
@@ -1,31 +1,297 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
 import sys
+import threading
+import traceback
 from loguru import logger
 from utils.config import settings
+from utils.metrics import metrics
 
-def setup_logger():
+# Request ID of the request being handled, set by the API middleware.
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+
+class LogRedactor:
     """
-    Configures the structured logger for the application.
+    Masks Aadhaar numbers and personal names before records reach a sink.
     """
-    logger.remove()  # Remove default handler
-    
-    # Add console handler
-    logger.add(
-        sys.stdout,
-        colorize=True,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level=settings.LOG_LEVEL,
+
+    # Not preceded by "<digit>." so the fraction of a float (e.g. a blur score) is left alone
+    AADHAAR_PATTERN = re.compile(r"(?<!\d)(?<!\d\.)\d{4}[ -]?\d{4}[ -]?(\d{4})(?!\.?\d)")
+    NAMED_VALUE_PATTERN = re.compile(
+        r"""(['"]?\b(?:name|FirstName|LastName|care_of)\b['"]?\s*[:=]\s*)(['"])(.*?)\2""",
+        re.IGNORECASE
     )
-    
-    # Add file handler
+    SENSITIVE_KEYS = {"name", "firstname", "lastname", "care_of", "address", "aadhaar_number", "dob"}
+
+    @staticmethod
+    def redact(text: str) -> str:
+        text = LogRedactor.AADHAAR_PATTERN.sub(lambda m: f"XXXX XXXX {m.group(1)}", text)
+        return LogRedactor.NAMED_VALUE_PATTERN.sub(lambda m: f"{m.group(1)}{m.group(2)}***{m.group(2)}", text)
+
+    @staticmethod
+    def redact_extra(extra: dict) -> dict:
+        return {
+            key: "***" if key.lower() in LogRedactor.SENSITIVE_KEYS else LogRedactor.redact(str(value))
+            for key, value in extra.items()
+        }
+
+
+class BackgroundLogSink:
+    """
+    Non-blocking loguru sink.
+
+    The calling thread only snapshots the record into a bounded queue; a
+    daemon thread does the expensive work (redaction, JSON encoding, disk
+    and console I/O). When the queue is full the record is dropped and
+    counted instead of blocking the request.
+    """
+
+    def __init__(self, file_path: str, max_queue: int, json_console: bool,
+                 max_bytes: int = 500 * 1024 * 1024, backup_count: int = 10):
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._json_console = json_console
+
+        self._file = None
+        if file_path:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            self._file = logging.handlers.RotatingFileHandler(
+                file_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+            )
+            self._file.setFormatter(logging.Formatter("%(message)s"))
+
+        self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._thread.start()
+
+        metrics.describe("log_records_dropped_total", "counter", "Log records dropped because the log buffer was full.")
+
+    def __call__(self, message):
+        record = message.record
+        item = (
+            record["time"],
+            record["level"].name,
+            record["name"],
+            record["function"],
+            record["line"],
+            record["message"],
+            dict(record["extra"]),
+            record["exception"],
+        )
+        self._enqueue(item, item[1])
+
+    def submit(self, payload: dict):
+        """
+        Queues a record already rendered by another process (see forward_logs_to).
+        """
+        self._enqueue(payload, payload.get("level", "-"))
+
+    def _enqueue(self, item, level: str):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc("log_records_dropped_total", level=level)
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._emit(item if isinstance(item, dict) else self._render(*item))
+            except Exception:
+                # Never let a bad record kill the writer thread.
+                pass
+
+    def _render(self, time, level, name, function, line, message, extra, exception) -> dict:
+        request_id = extra.pop("request_id", "-")
+        message = self._format(message, extra.pop("_args", ()), extra.pop("_kwargs", {}))
+        payload = {
+            "time": time.isoformat(),
+            "level": level,
+            "logger": f"{name}:{function}:{line}",
+            "request_id": request_id,
+            "message": LogRedactor.redact(message),
+        }
+        if extra:
+            payload["extra"] = LogRedactor.redact_extra(extra)
+        if exception:
+            formatted = "".join(traceback.format_exception(exception.type, exception.value, exception.traceback))
+            payload["exception"] = LogRedactor.redact(formatted)
+        return payload
+
+    def _emit(self, payload: dict):
+        json_line = json.dumps(payload, default=str)
+        if self._file is not None:
+            self._file.emit(logging.makeLogRecord({"msg": json_line, "args": None}))
+
+        if self._json_console:
+            console_line = json_line
+        else:
+            timestamp = payload["time"][:19].replace("T", " ")
+            console_line = (
+                f"{timestamp} | {payload['level']: <8} | {payload['logger']} "
+                f"[{payload['request_id']}] - {payload['message']}"
+            )
+            if "exception" in payload:
+                console_line += "\n" + payload["exception"]
+        sys.stdout.write(console_line + "\n")
+        sys.stdout.flush()
+
+    @staticmethod
+    def _format(message: str, args: tuple, kwargs: dict) -> str:
+        if not args and not kwargs:
+            return message
+        try:
+            return message.format(*args, **kwargs)
+        except Exception:
+            return f"{message} {args!r} {kwargs!r}"
+
+    def close(self, timeout: float = 2.0):
+        """
+        Flushes pending records on shutdown without waiting on a stalled disk forever.
+        """
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        if self._file is not None:
+            self._file.close()
+
+
+class ForwardingLogSink(BackgroundLogSink):
+    """
+    Sink for child processes: renders records on its own writer thread like
+    BackgroundLogSink, then hands them to the parent process over a
+    multiprocessing queue, so only the parent writes (and rotates) the log file.
+    """
+
+    def __init__(self, mp_queue, max_queue: int):
+        self._mp_queue = mp_queue
+        super().__init__(file_path=None, max_queue=max_queue, json_console=False)
+
+    def _emit(self, payload: dict):
+        self._mp_queue.put(payload)
+
+
+class LevelSampler:
+    """
+    Keeps a configurable fraction of records per level, e.g. "INFO=0.1,DEBUG=0.01".
+    Levels that are not listed are always kept.
+    """
+
+    def __init__(self, spec: str):
+        self.rates = {}
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            level, _, rate = part.partition("=")
+            self.rates[level.strip().upper()] = float(rate)
+        metrics.describe("log_records_sampled_out_total", "counter", "Log records discarded by level sampling.")
+
+    def keep(self, level: str) -> bool:
+        rate = self.rates.get(level)
+        if rate is None or rate >= 1.0 or random.random() < rate:
+            return True
+        metrics.inc("log_records_sampled_out_total", level=level)
+        return False
+
+
+class AppLogger:
+    """
+    The logger used by application code (`app_logger`).
+
+    Level filtering and sampling happen before loguru builds a record, and
+    "{}" arguments travel with the record and are only formatted by the
+    sink's writer thread, so dropped or sampled-out calls cost no formatting
+    and kept ones don't format on the request path. Arguments are therefore
+    rendered when written: don't mutate them right after logging.
+    """
+
+    def __init__(self, sink_logger, level: str, sampler: LevelSampler):
+        self._logger = sink_logger
+        min_level = sink_logger.level(level).no
+        self._enabled = {
+            name: sink_logger.level(name).no >= min_level
+            for name in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+        }
+        self._sampler = sampler
+
+    def _log(self, level: str, message: str, args: tuple, kwargs: dict, exception: bool = False):
+        if not self._enabled[level] or not self._sampler.keep(level):
+            return
+        # depth=2 attributes the record to the caller of info()/error()/...
+        self._logger.opt(depth=2, exception=exception).bind(_args=args, _kwargs=kwargs).log(level, message)
+
+    def debug(self, message: str, *args, **kwargs):
+        self._log("DEBUG", message, args, kwargs)
+
+    def info(self, message: str, *args, **kwargs):
+        self._log("INFO", message, args, kwargs)
+
+    def warning(self, message: str, *args, **kwargs):
+        self._log("WARNING", message, args, kwargs)
+
+    def error(self, message: str, *args, **kwargs):
+        self._log("ERROR", message, args, kwargs)
+
+    def exception(self, message: str, *args, **kwargs):
+        self._log("ERROR", message, args, kwargs, exception=True)
+
+    def critical(self, message: str, *args, **kwargs):
+        self._log("CRITICAL", message, args, kwargs)
+
+
+def _attach_request_id(record):
+    record["extra"].setdefault("request_id", request_id_var.get())
+
+
+def _install_sink(sink: BackgroundLogSink):
+    global log_sink
+    logger.remove()
     logger.add(
-        "logs/app.log",
-        rotation="500 MB",
-        retention="10 days",
-        compression="zip",
+        sink,
         level=settings.LOG_LEVEL,
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+        format="{message}",
+        backtrace=False,
+        diagnose=False,
     )
-    
-    return logger
+    atexit.register(sink.close)
+    log_sink = sink
+
+
+def setup_logger():
+    """
+    Configures the structured logger for the application.
+    """
+    logger.remove()  # Remove default handler
+    logger.configure(patcher=_attach_request_id)
+
+    _install_sink(BackgroundLogSink(
+        file_path=settings.LOG_FILE_PATH,
+        max_queue=settings.LOG_QUEUE_SIZE,
+        json_console=settings.LOG_JSON_CONSOLE,
+    ))
+
+    return AppLogger(logger, settings.LOG_LEVEL, LevelSampler(settings.LOG_SAMPLE_RATES))
+
+
+def forward_logs_to(mp_queue):
+    """
+    Switches a child process to sending its records to the parent, which
+    passes them to its own sink with `log_sink.submit`.
+    """
+    previous = log_sink
+    _install_sink(ForwardingLogSink(mp_queue, settings.LOG_QUEUE_SIZE))
+    previous.close()
+
 
+log_sink = None
 app_logger = setup_logger()